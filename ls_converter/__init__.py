@@ -5,27 +5,48 @@ from .errors import (
     IncorrectInputDataFormat,
     IncorrectlyFormattedInputData,
     IncorrectURLFormat,
+    IoUThresholdIncorrect,
+    MaxSizeIncorrect,
     MultipageABBYY,
+    MultipageTesseract,
     MultipleBlocks,
     NoSuchConverter,
+    NotSupportedByAgreement,
+    OutputIncorrect,
+    PageNumIncorrect,
     PerLevelIncorrect,
+    UnsupportedArchive,
     URLNotSet,
 )
-from .meta import Input, Levels
+from .agreement import get_agreement_scores
+from .archive import Archive
+from .meta import Input, Levels, Output
+from .regions import process_regions, split_into_parts
+from .serialise import encode_region, get_task_bytes, join_tasks
 from .utils import (
+    as_list,
     get_bbox_result,
     get_bbox,
     get_id,
+    get_task,
     get_transcription_result,
+    IMAGE_POOL,
+    ImagePool,
+    ImageSource,
     load_json,
     load_xml_as_json,
     open_image,
+    Region,
+    set_int,
+    split_pages,
     url_to_image,
 )
 
+from pathlib import Path
 from PIL import Image
-from typing import Union
+from typing import Iterator, Union
 
+import json
 import warnings
 
 
@@ -64,7 +85,7 @@ class LabelStudioConverter:
         if not isinstance(input_data, dict):
             raise IncorrectInputDataFormat()
 
-        if not isinstance(image, Image.Image):
+        if not isinstance(image, (Image.Image, ImageSource)):
             raise IncorrectImageFormat()
 
         if url and not isinstance(url, str):
@@ -75,34 +96,51 @@ class LabelStudioConverter:
                 "Input data looks empty. Did you provide the correct data?"
             )
 
+        if kwargs.get("output") not in [None, Output.DICT, Output.BYTES]:
+            raise OutputIncorrect()
+
+        for key in ["max_regions", "max_bytes"]:
+            if kwargs.get(key) is not None and not (
+                isinstance(kwargs[key], int) and kwargs[key] > 0
+            ):
+                raise MaxSizeIncorrect(key)
+
+        if kwargs.get("merge_iou") is not None and not (
+            isinstance(kwargs["merge_iou"], (int, float))
+            and 0 < kwargs["merge_iou"] <= 1
+        ):
+            raise IoUThresholdIncorrect()
+
         return True
 
-    def convert(
+    def load(
         self,
-        image: Union[Image.Image, str],
+        image: Union[Image.Image, ImageSource, str, bytes],
         input_data: Union[dict, str],
         url: Union[str, None] = None,
-        **kwargs,
-    ) -> dict:
-        # Start up the converter
-        converter = self.set_converter()
-
-        # If we get an image string, we try to open it (from URL or local).
-        # Fail silently because it will otherwise be caught by assertion.
+    ) -> tuple:
+        """
+        Given an image and input data, either of which may be a path (or, for
+        the image, a URL or bytes), returns a tuple of the image, the input
+        data (opened) and the URL. The image is returned as an (unopened)
+        ImageSource, to be opened only for as long as it is needed.
+        """
+
+        # If we get an image string, it is the URL unless one is given
         if isinstance(image, str):
             if image.startswith("http") and url is None:
                 url = image
-                image = url_to_image(image)
-            else:
-                if url is None:
-                    warnings.warn(
-                        URLNotSet.MESSAGE,
-                        URLNotSet,
-                    )
+            elif url is None:
+                warnings.warn(
+                    URLNotSet.MESSAGE,
+                    URLNotSet,
+                )
+
+                url = image
 
-                image = open_image(image)
-                if isinstance(image, Image.Image) and url is None:
-                    url = image.filename
+        # Anything else will be caught by assertion
+        if isinstance(image, (Image.Image, str, bytes)):
+            image = ImageSource(image)
 
         # If we get an input data string, we try to open it as a JSON file.
         # Fail silently because it will otherwise be caught by assertion.
@@ -115,12 +153,166 @@ class LabelStudioConverter:
         if isinstance(input_data, str):
             input_data = load_xml_as_json(input_data)
 
+        return image, input_data, url
+
+    def convert(
+        self,
+        image: Union[Image.Image, ImageSource, str, bytes],
+        input_data: Union[dict, str],
+        url: Union[str, None] = None,
+        **kwargs,
+    ) -> Union[dict, bytes]:
+        # Start up the converter
+        converter = self.set_converter()
+
+        # Open input data if passed as a path, and wrap the image
+        image, input_data, url = self.load(image, input_data, url)
+
         # Test whether types are correctly set up
-        self.assertion(input_data, image, url)
-        converter.assertion(input_data, image, url, **kwargs)
+        self.assertion(input_data, image, url, **kwargs)
+
+        # Only hold the image open while converting
+        with image:
+            converter.assertion(input_data, image, url, **kwargs)
+
+            # Pass on convert method to the converter class
+            return converter.convert(input_data, image, url, **kwargs)
+
+    def convert_pages(
+        self,
+        image: Union[Image.Image, ImageSource, str, bytes],
+        input_data: Union[dict, str],
+        url: Union[str, None] = None,
+        **kwargs,
+    ) -> Iterator[Union[dict, bytes]]:
+        """
+        Given an image and input data spanning several pages (e.g. Tesseract
+        output for a multi-page TIFF), yields one task per page, each with the
+        page's own image size and its page number in the task's data. Frames
+        are accessed one at a time, as each page is converted, and the image
+        is held open until the last page is converted.
+
+        Input data without page numbers is converted as a single page.
+        """
 
-        # Pass on convert method to the converter class
-        return converter.convert(input_data, image, url, **kwargs)
+        image, input_data, url = self.load(image, input_data, url)
+
+        if not isinstance(input_data, dict) or "page_num" not in input_data:
+            yield self.convert(image, input_data, url, **kwargs)
+            return
+
+        self.assertion(input_data, image, url, **kwargs)
+
+        with image:
+            for page_num, page_data in sorted(split_pages(input_data).items()):
+                yield self.convert(
+                    image, page_data, url, page_num=page_num, **kwargs
+                )
+
+    @classmethod
+    def build_task(
+        self,
+        regions: list,
+        image: Union[Image.Image, ImageSource],
+        url: Union[str, None] = None,
+        output: str = Output.DICT,
+        merge_iou: Union[float, None] = None,
+        reading_order: bool = False,
+        data: Union[dict, None] = None,
+        max_regions: Union[int, None] = None,
+        max_bytes: Union[int, None] = None,
+        **kwargs,
+    ) -> Union[dict, bytes, list]:
+        """
+        Given the regions extracted by a converter, the image and a URL,
+        returns the Label Studio task as a dictionary or, if output is set to
+        Output.BYTES, serialised straight to JSON bytes. Any data is added to
+        the task's data alongside the URL.
+
+        If merge_iou is set, regions overlapping with at least that IoU are
+        merged and duplicated regions dropped; if reading_order is set, the
+        regions are sorted into reading order (see regions.process_regions).
+
+        If max_regions or max_bytes is set, a list of tasks is returned
+        instead, splitting the page into horizontal bands so that no task has
+        more than max_regions regions or (roughly) max_bytes bytes of results
+        (see regions.split_into_parts). Each task refers to the whole image,
+        and has its part number (counting from 1) and the number of parts in
+        its data, so that the page can be put back together (see
+        reverse.convert_export).
+        """
+
+        image_width, image_height = image.size
+
+        regions = process_regions(regions, merge_iou, reading_order)
+
+        if output == Output.BYTES:
+            get_output = get_task_bytes
+        else:
+            get_output = get_task
+
+        if max_regions is None and max_bytes is None:
+            return get_output(regions, image_width, image_height, url, data)
+
+        sizes = (
+            [len(encode_region(x, image_width, image_height)) for x in regions]
+            if max_bytes is not None
+            else [0 for _ in regions]
+        )
+
+        parts = split_into_parts(regions, sizes, max_regions, max_bytes)
+
+        return [
+            get_output(
+                part,
+                image_width,
+                image_height,
+                url,
+                dict(data or {}, part=i, parts=len(parts)),
+            )
+            for i, part in enumerate(parts, start=1)
+        ]
+
+    def convert_archive(
+        self,
+        archive: Union[Archive, Path, str],
+        url_prefix: Union[str, None] = None,
+        **kwargs,
+    ) -> Iterator[dict]:
+        """
+        Given a ZIP or TAR export archive, pairs every image in it with its
+        OCR data file (by stem) and yields one converted task per pair,
+        reading each member straight from the archive. Tasks from TAR
+        archives come in archive order, so that compressed TAR files are
+        decompressed a fixed number of times, rather than once per member
+        (see Archive.iter_pairs).
+
+        If url_prefix is set, each task's URL is the url_prefix followed by
+        the image's member name; otherwise the member name is used.
+        """
+
+        if not isinstance(archive, Archive):
+            with Archive(archive) as archive:
+                yield from self.convert_archive(archive, url_prefix, **kwargs)
+            return
+
+        if url_prefix is None:
+            warnings.warn(
+                URLNotSet.MESSAGE,
+                URLNotSet,
+            )
+
+        for image_name, data_name, image, data in archive.iter_pairs():
+            url = (url_prefix or "") + image_name
+
+            # Read as bytes, so that the image is closed (and its contents
+            # dropped) as soon as it is converted
+            yield self.convert(
+                image=ImageSource(image),
+                input_data=archive.load_json(data_name, contents=data),
+                url=url,
+                **kwargs,
+            )
 
 
 class ABBYYConverter(LabelStudioConverter):
@@ -143,10 +335,8 @@ class ABBYYConverter(LabelStudioConverter):
         return True
 
     @classmethod
-    def convert(self, input_data: dict, image: Image.Image, url=None):
-        results, all_scores = [], []
-
-        image_width, image_height = image.size
+    def get_regions(self, input_data: dict, image: Image.Image, **kwargs):
+        regions = []
 
         page = input_data["layout"]["pages"][0]  # asserted in self.assertion
         blocks = {x["id"]: x for x in page["texts"]}
@@ -158,45 +348,32 @@ class ABBYYConverter(LabelStudioConverter):
             block_content[blockId] += [(paragraph["text"], paragraph["role"])]
 
         for blockId, block_data in blocks.items():
-            region_id = get_id()
-
-            bbox = get_bbox(
-                x=block_data["position"]["l"],
-                y=block_data["position"]["t"],
-                width=(
-                    block_data["position"]["r"] - block_data["position"]["l"]
-                ),
-                height=(
-                    block_data["position"]["b"] - block_data["position"]["t"]
-                ),
-                image_width=image_width,
-                image_height=image_height,
-            )
-
-            bbox_result = get_bbox_result(region_id, bbox)
+            position = block_data["position"]
 
             # Collate all texts into `texts` list
             texts = [x[0] for x in block_content[blockId]]
 
-            transcription_result = get_transcription_result(
-                region_id, bbox, texts, score=block_data["confidence"]
+            regions.append(
+                Region(
+                    id=get_id(),
+                    x=set_int(position["l"]),
+                    y=set_int(position["t"]),
+                    width=set_int(position["r"]) - set_int(position["l"]),
+                    height=set_int(position["b"]) - set_int(position["t"]),
+                    text="\n".join(texts).strip(),
+                    score=block_data["confidence"],
+                )
             )
 
-            # Extend/append all results and scores
-            results.extend([bbox_result, transcription_result])
-            all_scores.append(transcription_result["score"])
+        return regions
 
-        score = sum(all_scores) / len(all_scores) if all_scores else 0
+    @classmethod
+    def convert(
+        self, input_data: dict, image: Image.Image, url=None, **kwargs
+    ) -> Union[dict, bytes]:
+        regions = self.get_regions(input_data, image, **kwargs)
 
-        return {
-            "data": {"ocr": url},
-            "predictions": [
-                {
-                    "result": results,
-                    "score": score,
-                }
-            ],
-        }
+        return self.build_task(regions, image, url, **kwargs)
 
 
 class TranskribusConverter(LabelStudioConverter):
@@ -206,7 +383,7 @@ class TranskribusConverter(LabelStudioConverter):
 
     @classmethod
     def assertion(
-        self, input_data: dict, image: Image.Image, url: str
+        self, input_data: dict, image: Image.Image, url: str, **kwargs
     ) -> True:
         try:
             input_data["alto"]["Layout"]["Page"]["PrintSpace"]["TextBlock"]
@@ -218,50 +395,41 @@ class TranskribusConverter(LabelStudioConverter):
         return True
 
     @classmethod
-    def convert(self, input_data: dict, image: Image.Image, url=None) -> dict:
-        results, all_scores = [], []
-
-        image_width, image_height = image.size
+    def get_regions(self, input_data: dict, image: Image.Image, **kwargs):
+        regions = []
 
         page = input_data["alto"]["Layout"]["Page"]
-        textblocks = page["PrintSpace"]["TextBlock"]
+        textblocks = as_list(page["PrintSpace"]["TextBlock"])
 
         for block in textblocks:
-            region_id = get_id()
-
-            bbox = get_bbox(
-                x=block["@HPOS"],
-                y=block["@VPOS"],
-                width=block["@WIDTH"],
-                height=block["@HEIGHT"],
-                image_width=image_width,
-                image_height=image_height,
+            # Collate all text into `texts` list, one item per line (with the
+            # line's strings, i.e. words in standard ALTO, joined by spaces)
+            texts = [
+                " ".join(x["@CONTENT"] for x in as_list(line.get("String")))
+                for line in as_list(block.get("TextLine"))
+            ]
+
+            regions.append(
+                Region(
+                    id=get_id(),
+                    x=set_int(block["@HPOS"]),
+                    y=set_int(block["@VPOS"]),
+                    width=set_int(block["@WIDTH"]),
+                    height=set_int(block["@HEIGHT"]),
+                    text="\n".join(texts).strip(),
+                    score=0,
+                )
             )
 
-            bbox_result = get_bbox_result(region_id, bbox)
-
-            # Collate all text into `texts` list
-            texts = [line["String"]["@CONTENT"] for line in block["TextLine"]]
+        return regions
 
-            transcription_result = get_transcription_result(
-                region_id, bbox, texts, score=0
-            )
+    @classmethod
+    def convert(
+        self, input_data: dict, image: Image.Image, url=None, **kwargs
+    ) -> Union[dict, bytes]:
+        regions = self.get_regions(input_data, image, **kwargs)
 
-            # Extend/append all results and scores
-            results.extend([bbox_result, transcription_result])
-            all_scores.append(transcription_result["score"])
-
-        score = sum(all_scores) / len(all_scores) if all_scores else 0
-
-        return {
-            "data": {"ocr": url},
-            "predictions": [
-                {
-                    "result": results,
-                    "score": score,
-                }
-            ],
-        }
+        return self.build_task(regions, image, url, **kwargs)
 
 
 class TesseractConverter(LabelStudioConverter):
@@ -272,15 +440,16 @@ class TesseractConverter(LabelStudioConverter):
         ):
             raise PerLevelIncorrect()
 
+        if kwargs.get("page_num") is not None and not (
+            isinstance(kwargs["page_num"], int) and kwargs["page_num"] > 0
+        ):
+            raise PageNumIncorrect()
+
         return True
 
     @classmethod
-    def convert(
-        self, input_data: dict, image: Image.Image, url=None, **kwargs
-    ) -> dict:
-        results, all_scores = [], []
-
-        image_width, image_height = image.size
+    def get_regions(self, input_data: dict, image: Image.Image, **kwargs):
+        regions = []
 
         if kwargs.get("per_level"):
             per_level = kwargs["per_level"]
@@ -291,19 +460,6 @@ class TesseractConverter(LabelStudioConverter):
 
         for i, level_idx in enumerate(input_data["level"]):
             if level_idx == per_level:
-                region_id = get_id()
-
-                bbox = get_bbox(
-                    x=input_data["left"][i],
-                    y=input_data["top"][i],
-                    width=input_data["width"][i],
-                    height=input_data["height"][i],
-                    image_width=image_width,
-                    image_height=image_height,
-                )
-
-                bbox_result = get_bbox_result(region_id, bbox)
-
                 # Collate all text into `text` and all confidences
                 # into `confidences`
                 text, confidences = [], []
@@ -316,34 +472,162 @@ class TesseractConverter(LabelStudioConverter):
                     if confidence != "-1":
                         confidences.append(float(confidence / 100.0))
 
-                text = " ".join(text).strip()
-
-                transcription_result = get_transcription_result(
-                    region_id,
-                    bbox,
-                    text,
-                    score=(
-                        sum(confidences) / len(confidences)
-                        if confidences
-                        else 0
-                    ),
+                regions.append(
+                    Region(
+                        id=get_id(),
+                        x=set_int(input_data["left"][i]),
+                        y=set_int(input_data["top"][i]),
+                        width=set_int(input_data["width"][i]),
+                        height=set_int(input_data["height"][i]),
+                        text=" ".join(text).strip(),
+                        score=(
+                            sum(confidences) / len(confidences)
+                            if confidences
+                            else 0
+                        ),
+                    )
                 )
 
-                # Extend/append all results and scores
-                results.extend([bbox_result, transcription_result])
-                all_scores.append(transcription_result["score"])
+        return regions
 
-        score = sum(all_scores) / len(all_scores) if all_scores else 0
+    @classmethod
+    def convert(
+        self, input_data: dict, image: Image.Image, url=None, **kwargs
+    ) -> Union[dict, bytes]:
+        page_num, data = kwargs.get("page_num"), None
+
+        if page_num is None:
+            if len(set(input_data.get("page_num", []))) > 1:
+                warnings.warn(
+                    MultipageTesseract.MESSAGE,
+                    MultipageTesseract,
+                )
+        else:
+            # Only keep the page's rows, and move to the page's frame (which
+            # reads the frame's header, without decoding any image data)
+            input_data = split_pages(input_data).get(
+                page_num, {key: [] for key in input_data.keys()}
+            )
+            try:
+                image.seek(page_num - 1)
+            except EOFError:
+                raise PageNumIncorrect(f"Image has no page {page_num}.")
+
+            data = {"page": page_num}
+
+        regions = self.get_regions(input_data, image, **kwargs)
 
         if url is None:
             url = image.filename
 
-        return {
+        return self.build_task(regions, image, url, data=data, **kwargs)
+
+
+class AgreementConverter(LabelStudioConverter):
+    """
+    Converts the output of several OCR engines for the same image into one
+    task, with one prediction per engine. Each prediction's score is the
+    engine's agreement with the other engines (see
+    agreement.get_agreement_scores), so that the pages where the engines
+    disagree the most can be prioritised for annotation.
+    """
+
+    def __init__(self, input_formats: list = [Input.TESSERACT]):
+        if not input_formats:
+            raise RuntimeError("input_formats must be set.")
+
+        self.converters = [LabelStudioConverter(x) for x in input_formats]
+        self.input_formats = input_formats
+
+    def set_converter(self):
+        raise NotSupportedByAgreement("set_converter")
+
+    def convert_pages(self, *args, **kwargs):
+        raise NotSupportedByAgreement("convert_pages")
+
+    def convert_archive(self, *args, **kwargs):
+        raise NotSupportedByAgreement("convert_archive")
+
+    def convert(
+        self,
+        image: Union[Image.Image, str],
+        input_data: list,
+        url: Union[str, None] = None,
+        iou_threshold: float = 0.5,
+        **kwargs,
+    ) -> Union[dict, bytes]:
+        """
+        Given an image and a list of input data, one per input format,
+        returns the task with one prediction per engine, as a dictionary or,
+        if output is set to Output.BYTES, serialised to JSON bytes. Pages
+        cannot be split into several tasks (max_regions or max_bytes).
+        """
+
+        if not isinstance(input_data, list) or len(input_data) != len(
+            self.converters
+        ):
+            raise IncorrectInputDataFormat(
+                "Input data must be a list with one item per input format."
+            )
+
+        if not (
+            isinstance(iou_threshold, (int, float)) and 0 < iou_threshold <= 1
+        ):
+            raise IoUThresholdIncorrect()
+
+        for key in ["max_regions", "max_bytes"]:
+            if kwargs.get(key) is not None:
+                raise NotSupportedByAgreement(key)
+
+        # Extract each engine's regions, holding the image open throughout
+        image, _, url = self.load(image, {}, url)
+        if not isinstance(image, ImageSource):
+            raise IncorrectImageFormat()
+
+        engines = []
+        with image:
+            for parent, data in zip(self.converters, input_data):
+                converter = parent.set_converter()
+
+                _, data, _ = self.load(image, data, url)
+
+                parent.assertion(data, image, url, **kwargs)
+                converter.assertion(data, image, url, **kwargs)
+
+                engines.append(
+                    process_regions(
+                        converter.get_regions(data, image, **kwargs),
+                        kwargs.get("merge_iou"),
+                        kwargs.get("reading_order", False),
+                    )
+                )
+
+        if url is None:
+            url = getattr(image, "filename", None)
+
+        scores = get_agreement_scores(engines, iou_threshold)
+
+        image_width, image_height = image.size
+
+        predictions = []
+        for input_format, regions, score in zip(
+            self.input_formats, engines, scores
+        ):
+            prediction = get_task(regions, image_width, image_height, url)[
+                "predictions"
+            ][0]
+            prediction["model_version"] = input_format
+            prediction["score"] = score
+            predictions.append(prediction)
+
+        task = {
             "data": {"ocr": url},
-            "predictions": [
-                {
-                    "result": results,
-                    "score": score,
-                }
-            ],
+            "predictions": predictions,
         }
+
+        # The predictions are built as dictionaries, so they are left to
+        # json.dumps
+        if kwargs.get("output") == Output.BYTES:
+            return json.dumps(task).encode()
+
+        return task
@@ -0,0 +1,180 @@
+from .meta import Input
+
+import argparse
+import signal
+import sys
+
+
+INPUT_FORMATS = [Input.TESSERACT, Input.ABBYY, Input.TRANSKRIBUS]
+
+
+def watch(args: argparse.Namespace) -> None:
+    from .watch import Watcher
+
+    watcher = Watcher(
+        args.input_dirs,
+        args.output_dir,
+        input_format=args.input_format,
+        url_prefix=args.url_prefix,
+        workers=args.workers,
+        queue_size=args.queue_size,
+        settle=args.settle,
+        interval=args.interval,
+        max_lines=args.max_lines,
+        max_regions=args.max_regions,
+        max_bytes=args.max_bytes,
+    )
+
+    # Finish converting what has been queued before exiting
+    signal.signal(signal.SIGINT, watcher.stop)
+    signal.signal(signal.SIGTERM, watcher.stop)
+
+    watcher.run()
+
+
+def convert(args: argparse.Namespace) -> None:
+    from .shard import convert_shard
+
+    convert_shard(
+        args.manifest,
+        args.output_dir,
+        shard=args.shard,
+        input_format=args.input_format,
+        max_regions=args.max_regions,
+        max_bytes=args.max_bytes,
+    )
+
+
+def merge(args: argparse.Namespace) -> None:
+    from .shard import merge_shards
+
+    summary = merge_shards(args.shards_dir, args.output)
+
+    print(f"Merged {summary['tasks']} tasks into {args.output}.")
+    for index, error in summary["failed"]:
+        print(f"Manifest item {index} failed: {error}")
+
+    if summary["failed"]:
+        sys.exit(1)
+
+
+def validate(args: argparse.Namespace) -> None:
+    from .validate import validate_manifest
+
+    summary = validate_manifest(
+        args.manifest, input_format=args.input_format, workers=args.workers
+    )
+
+    for index, field, error in summary["failures"]:
+        print(f"Manifest item {index} {field}: {error}")
+
+    failed = len({x[0] for x in summary["failures"]})
+    print(f"Checked {summary['items']} items, {failed} failed.")
+
+    if failed:
+        sys.exit(1)
+
+
+def add_split_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--max-regions",
+        type=int,
+        help="Split pages into tasks of at most this many regions.",
+    )
+    parser.add_argument(
+        "--max-bytes",
+        type=int,
+        help="Split pages into tasks of at most (about) this many bytes.",
+    )
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="ls-converter",
+        description="Convert OCR outputs into Label Studio tasks.",
+    )
+    subparsers = parser.add_subparsers(required=True)
+
+    # ls-converter watch
+    parser_watch = subparsers.add_parser(
+        "watch",
+        help="Watch directories and convert image/OCR pairs as they arrive.",
+    )
+    parser_watch.add_argument("input_dirs", nargs="+")
+    parser_watch.add_argument("-o", "--output-dir", required=True)
+    parser_watch.add_argument(
+        "-f", "--input-format", choices=INPUT_FORMATS, default=Input.TESSERACT
+    )
+    parser_watch.add_argument("--url-prefix")
+    parser_watch.add_argument("--workers", type=int, default=4)
+    parser_watch.add_argument("--queue-size", type=int, default=100)
+    parser_watch.add_argument(
+        "--settle",
+        type=float,
+        default=5.0,
+        help="Seconds both files of a pair must be unchanged before use.",
+    )
+    parser_watch.add_argument(
+        "--interval",
+        type=float,
+        default=2.0,
+        help="Seconds between directory scans.",
+    )
+    parser_watch.add_argument(
+        "--max-lines",
+        type=int,
+        default=10000,
+        help="Tasks per JSONL output before rolling over to a new file.",
+    )
+    add_split_arguments(parser_watch)
+    parser_watch.set_defaults(func=watch)
+
+    # ls-converter convert
+    parser_convert = subparsers.add_parser(
+        "convert",
+        help="Convert the items of a JSONL manifest, optionally one shard.",
+    )
+    parser_convert.add_argument("manifest")
+    parser_convert.add_argument("-o", "--output-dir", required=True)
+    parser_convert.add_argument(
+        "-f", "--input-format", choices=INPUT_FORMATS, default=Input.TESSERACT
+    )
+    parser_convert.add_argument(
+        "--shard",
+        default="1/1",
+        help="Only convert shard i of N (i/N, counting from 1).",
+    )
+    add_split_arguments(parser_convert)
+    parser_convert.set_defaults(func=convert)
+
+    # ls-converter merge
+    parser_merge = subparsers.add_parser(
+        "merge",
+        help="Merge and verify the outputs of all shards of a manifest.",
+    )
+    parser_merge.add_argument("shards_dir")
+    parser_merge.add_argument("-o", "--output", required=True)
+    parser_merge.set_defaults(func=merge)
+
+    # ls-converter validate
+    parser_validate = subparsers.add_parser(
+        "validate",
+        help="Check all items of a JSONL manifest before converting them.",
+    )
+    parser_validate.add_argument("manifest")
+    parser_validate.add_argument(
+        "-f", "--input-format", choices=INPUT_FORMATS, default=Input.TESSERACT
+    )
+    parser_validate.add_argument("--workers", type=int, default=8)
+    parser_validate.set_defaults(func=validate)
+
+    return parser
+
+
+def main(argv: list = None) -> None:
+    args = get_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+from .regions import GridIndex, get_iou
+
+from itertools import combinations
+
+
+def get_distance(a: str, b: str) -> int:
+    """
+    Returns the Levenshtein (edit) distance between two strings, using
+    Myers' bit-parallel algorithm (as adapted by Hyyrö): each column of the
+    edit distance table is kept as bit vectors in two integers, so a whole
+    column is computed in a handful of integer operations rather than one
+    step per character.
+    """
+
+    if a == b:
+        return 0
+
+    # Keep the shorter string in the bit vectors
+    if len(a) < len(b):
+        a, b = b, a
+
+    if not b:
+        return len(a)
+
+    # Bit masks of the positions of each character in b
+    positions = {}
+    for i, char in enumerate(b):
+        positions[char] = positions.get(char, 0) | (1 << i)
+
+    mask, last = (1 << len(b)) - 1, 1 << (len(b) - 1)
+
+    # Vertical positive and negative deltas, and the bottom row's distance
+    plus, minus, distance = mask, 0, len(b)
+    for char in a:
+        equal = positions.get(char, 0)
+        vertical = equal | minus
+        horizontal = (((equal & plus) + plus) ^ plus) | equal
+
+        plus_h = minus | ~(horizontal | plus)
+        minus_h = plus & horizontal
+
+        if plus_h & last:
+            distance += 1
+        elif minus_h & last:
+            distance -= 1
+
+        # Shift in the top row, where the distance always grows by one
+        plus_h = (plus_h << 1) | 1
+        minus_h = minus_h << 1
+
+        plus = (minus_h | ~(vertical | plus_h)) & mask
+        minus = plus_h & vertical
+
+    return distance
+
+
+def get_cer(a: str, b: str) -> float:
+    """
+    Returns the character error rate between two strings, normalised by the
+    longer of the two so that it is symmetric and lies between 0 and 1.
+    """
+
+    if not a and not b:
+        return 0
+
+    return get_distance(a, b) / max(len(a), len(b))
+
+
+def match_regions(a: list, b: list, iou_threshold: float = 0.5) -> list:
+    """
+    Given two lists of regions (see utils.Region) for the same image, returns
+    a list of (i, j) index tuples matching regions in a to regions in b
+    one-to-one, best overlapping pairs first, for pairs overlapping with an
+    IoU of at least iou_threshold. Candidate pairs are found through a
+    GridIndex rather than by comparing every pair.
+    """
+
+    if not a or not b:
+        return []
+
+    index = GridIndex(b)
+
+    candidates = []
+    for i, region in enumerate(a):
+        for j in index.query(region):
+            iou = get_iou(region, b[j])
+            if iou >= iou_threshold:
+                candidates.append((iou, i, j))
+
+    matches, matched_a, matched_b = [], set(), set()
+    for _, i, j in sorted(candidates, reverse=True):
+        if i in matched_a or j in matched_b:
+            continue
+
+        matches.append((i, j))
+        matched_a.add(i)
+        matched_b.add(j)
+
+    return sorted(matches)
+
+
+def get_agreement(a: list, b: list, iou_threshold: float = 0.5) -> float:
+    """
+    Given two lists of regions for the same image, returns how much they
+    agree, between 0 and 1: the text agreement (1 - CER) of the matched
+    regions (see match_regions), divided by the number of regions in the
+    larger list, so that unmatched regions count as full disagreement.
+    """
+
+    if not a and not b:
+        return 1
+
+    agreement = sum(
+        1 - get_cer(a[i].text, b[j].text)
+        for i, j in match_regions(a, b, iou_threshold)
+    )
+
+    return agreement / max(len(a), len(b))
+
+
+def get_agreement_scores(engines: list, iou_threshold: float = 0.5) -> list:
+    """
+    Given a list of lists of regions, one per OCR engine, for the same image,
+    returns each engine's average agreement (see get_agreement) with all
+    other engines. The average of the returned scores is the page's overall
+    agreement.
+    """
+
+    if len(engines) < 2:
+        return [1 for _ in engines]
+
+    totals = [0 for _ in engines]
+    for i, j in combinations(range(len(engines)), 2):
+        agreement = get_agreement(engines[i], engines[j], iou_threshold)
+        totals[i] += agreement
+        totals[j] += agreement
+
+    return [x / (len(engines) - 1) for x in totals]
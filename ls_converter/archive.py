@@ -0,0 +1,223 @@
+from .errors import ExpatError, UnidentifiedImageError, UnsupportedArchive
+from .utils import pair_files
+
+from io import BytesIO
+from pathlib import Path
+from PIL import Image
+from typing import Iterator, Union
+
+import json
+import tarfile
+import xmltodict
+import zipfile
+
+
+class Archive:
+    """
+    Read-only view of a ZIP or TAR export archive (e.g. a Transkribus or
+    ABBYY batch export). Members are read straight from the archive into
+    memory, one at a time, so nothing is ever extracted to disk.
+
+    Use as a context manager to ensure the underlying archive is closed:
+
+        with Archive("export.zip") as archive:
+            for image_name, data_name in archive.pairs():
+                ...
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+
+        if not self.path.exists():
+            raise FileNotFoundError(f"Archive could not be found: {path}.")
+
+        self._zip, self._tar, self._members = None, None, {}
+
+        if zipfile.is_zipfile(self.path):
+            self._zip = zipfile.ZipFile(self.path)
+        elif tarfile.is_tarfile(self.path):
+            # Note: random access is cheap for uncompressed TAR files only;
+            # compressed TAR files are decompressed up to each member read
+            # (see iter_pairs). Listing the members here is itself one pass
+            # through the whole (decompressed) archive.
+            self._tar = tarfile.open(self.path, mode="r:*")
+            self._members = {
+                x.name: x for x in self._tar.getmembers() if x.isfile()
+            }
+        else:
+            raise UnsupportedArchive(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self) -> None:
+        if self._zip is not None:
+            self._zip.close()
+        if self._tar is not None:
+            self._tar.close()
+
+    def names(self) -> list:
+        """
+        Returns the names of all (file) members in the archive.
+        """
+
+        if self._zip is not None:
+            return [x.filename for x in self._zip.infolist() if not x.is_dir()]
+
+        return list(self._members.keys())
+
+    def pairs(self, **kwargs) -> list:
+        """
+        Returns a list of (image, data) member name tuples, paired by stem.
+        Any keyword arguments are passed on to utils.pair_files.
+        """
+
+        return pair_files(self.names(), **kwargs)
+
+    def iter_pairs(self, **kwargs) -> Iterator[tuple]:
+        """
+        Yields (image, data, image_bytes, data_bytes) tuples for all pairs
+        (see pairs). ZIP members are read in pairs order.
+
+        TAR members are read in archive order instead, as going back in a
+        compressed TAR means decompressing it again from the start: data
+        members are kept in memory until their image is reached, and images
+        reached before their data are read in a further pass once all data
+        has been read. Together with listing the members (see __init__),
+        a compressed TAR is decompressed two times over, or three if any
+        image comes before its data (as in Transkribus exports).
+        """
+
+        pairs = self.pairs(**kwargs)
+
+        if self._zip is not None:
+            for image, data in pairs:
+                image_bytes = self.read_bytes(image)
+                yield image, data, image_bytes, self.read_bytes(data)
+            return
+
+        images = dict(pairs)
+
+        # Number of images still to be read per data member
+        remaining = {}
+        for data in images.values():
+            remaining[data] = remaining.get(data, 0) + 1
+
+        def get_data(data: str) -> bytes:
+            remaining[data] -= 1
+            if remaining[data]:
+                return buffered[data]
+
+            return buffered.pop(data)
+
+        buffered, deferred = {}, []
+        for member in self._tar:
+            # Only read the member kept for each name (see __init__)
+            if self._members.get(member.name) is not member:
+                continue
+
+            if member.name in remaining:
+                buffered[member.name] = self.read_bytes(member.name)
+            elif member.name in images:
+                data = images[member.name]
+                if data not in buffered:
+                    deferred.append(member.name)
+                    continue
+
+                image_bytes = self.read_bytes(member.name)
+                yield member.name, data, image_bytes, get_data(data)
+
+        for image in deferred:
+            data = images[image]
+            image_bytes = self.read_bytes(image)
+            yield image, data, image_bytes, get_data(data)
+
+    def read_bytes(self, name: str) -> bytes:
+        """
+        Given a member name, returns its contents as bytes.
+        """
+
+        if self._zip is not None:
+            try:
+                return self._zip.read(name)
+            except KeyError:
+                raise FileNotFoundError(
+                    f"Member could not be found in {self.path}: {name}."
+                )
+
+        if name not in self._members:
+            raise FileNotFoundError(
+                f"Member could not be found in {self.path}: {name}."
+            )
+
+        return self._tar.extractfile(self._members[name]).read()
+
+    def read_text(self, name: str) -> str:
+        """
+        Given a member name, returns its contents as plain text.
+        """
+
+        return self.read_bytes(name).decode("utf-8")
+
+    def open_image(
+        self, name: str, fail: bool = False
+    ) -> Union[Image.Image, str]:
+        """
+        Archive counterpart of utils.open_image: given a member name, tries to
+        return it as a PIL.Image object. If fail is set to False, it will not
+        crash but return the name back.
+        """
+
+        try:
+            return Image.open(BytesIO(self.read_bytes(name)))
+        except UnidentifiedImageError:
+            if fail is False:
+                return name
+
+            raise UnidentifiedImageError(f"Unable to open image {name}")
+
+    def load_json(
+        self, name: str, fail: bool = False, contents: bytes = None
+    ) -> Union[dict, str]:
+        """
+        Archive counterpart of utils.load_json: given a member name, returns
+        its contents as a dictionary. Members with a .xml file ending are
+        passed on to load_xml_as_json. If the member's contents have already
+        been read (see iter_pairs), they can be passed in as contents.
+        """
+
+        if Path(name).suffix == ".xml":
+            return self.load_xml_as_json(name, fail=fail, contents=contents)
+
+        if contents is None:
+            contents = self.read_bytes(name)
+
+        try:
+            return json.loads(contents.decode("utf-8"))
+        except json.JSONDecodeError:
+            if fail is False:
+                return name
+
+            raise
+
+    def load_xml_as_json(
+        self, name: str, fail: bool = False, contents: bytes = None
+    ) -> Union[dict, str]:
+        """
+        Archive counterpart of utils.load_xml_as_json: given a member name,
+        returns its contents as a dictionary (parsed using xmltodict).
+        """
+
+        if contents is None:
+            contents = self.read_bytes(name)
+
+        try:
+            return xmltodict.parse(contents)
+        except ExpatError:
+            if fail is False:
+                return name
+
+            raise ExpatError(f"XML could not be loaded from {name}.")
@@ -114,3 +114,95 @@ class NotAnInteger(ValueError):
     ):
         self.message = f"An incorrect value was passed, expected an integer-like value: {val}"  # noqa
         super().__init__(self.message)
+
+
+class UnsupportedArchive(SyntaxError):
+    def __init__(
+        self,
+        path="",
+    ):
+        self.message = f"Archive must be a ZIP or TAR file: {path}"
+        super().__init__(self.message)
+
+
+class OutputIncorrect(SyntaxError):
+    def __init__(
+        self,
+        message="output should be one of the Output object's named properties.",  # noqa
+    ):
+        self.message = message
+        super().__init__(self.message)
+
+
+class ImageSizeNotSet(SyntaxError):
+    def __init__(
+        self,
+        url="",
+    ):
+        self.message = f"Image size could not be determined for {url}. Pass an image_size function, or export with original_width/original_height."  # noqa
+        super().__init__(self.message)
+
+
+class IoUThresholdIncorrect(SyntaxError):
+    def __init__(
+        self,
+        message="IoU threshold should be a number between 0 (exclusive) and 1.",  # noqa
+    ):
+        self.message = message
+        super().__init__(self.message)
+
+
+class PageNumIncorrect(SyntaxError):
+    def __init__(
+        self,
+        message="page_num should be a positive integer.",
+    ):
+        self.message = message
+        super().__init__(self.message)
+
+
+class MultipageTesseract(Warning):
+    MESSAGE = "Input data spans several pages, which will be merged into one task. Use convert_pages to get one task per page."  # noqa
+
+    def __init__(
+        self,
+        _="",
+    ):
+        self.message = self.MESSAGE
+
+    def __str__(self):
+        return repr(self.message)
+
+
+class ShardIncorrect(SyntaxError):
+    def __init__(
+        self,
+        shard="",
+    ):
+        self.message = f"Shard should be given as i/N, with 1 <= i <= N: {shard}"  # noqa
+        super().__init__(self.message)
+
+
+class ShardMismatch(RuntimeError):
+    def __init__(self, message=""):
+        self.message = (
+            f"Shards cannot be merged: {message}"
+            if message
+            else "Shards cannot be merged."
+        )
+        super().__init__(self.message)
+
+
+class MaxSizeIncorrect(SyntaxError):
+    def __init__(
+        self,
+        key="",
+    ):
+        self.message = f"{key} should be a positive integer."
+        super().__init__(self.message)
+
+
+class NotSupportedByAgreement(NotImplementedError):
+    def __init__(self, feature=""):
+        self.message = f"{feature} is not supported by AgreementConverter."
+        super().__init__(self.message)
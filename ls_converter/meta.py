@@ -33,3 +33,8 @@ class Levels:
             return "word_num"
 
         raise SyntaxError("Incorrect Tesseract level provided")
+
+
+class Output:
+    DICT = "dict"
+    BYTES = "bytes"
@@ -0,0 +1,329 @@
+from .utils import Region
+
+from statistics import median
+from typing import Union
+
+
+class GridIndex:
+    """
+    Uniform grid spatial index over regions (see utils.Region), in pixel
+    coordinates. Each region is registered in every cell it covers, so
+    finding the regions that may overlap a box only looks at the cells it
+    covers instead of comparing it with every other region.
+    """
+
+    def __init__(self, regions: list, cell_size: Union[int, None] = None):
+        self.regions = regions
+
+        # Default to cells about the size of a typical region
+        if cell_size is None:
+            cell_size = (
+                median(max(x.width, x.height) for x in regions)
+                if regions
+                else 1
+            )
+        self.cell_size = max(int(cell_size), 1)
+
+        self.cells = {}
+        for i, region in enumerate(regions):
+            for cell in self.get_cells(region):
+                self.cells.setdefault(cell, []).append(i)
+
+    def get_cells(self, region: Region) -> list:
+        """
+        Returns the grid cells covered by the region.
+        """
+
+        x0, y0 = region.x // self.cell_size, region.y // self.cell_size
+        x1 = (region.x + region.width) // self.cell_size
+        y1 = (region.y + region.height) // self.cell_size
+
+        return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+    def query(self, region: Region) -> set:
+        """
+        Returns the indices of all indexed regions that share a cell with the
+        region (i.e. candidates for overlapping it).
+        """
+
+        return {
+            i
+            for cell in self.get_cells(region)
+            for i in self.cells.get(cell, [])
+        }
+
+
+def get_intersection(a: Region, b: Region) -> int:
+    """
+    Returns the area (in pixels) where the two regions overlap.
+    """
+
+    width = min(a.x + a.width, b.x + b.width) - max(a.x, b.x)
+    height = min(a.y + a.height, b.y + b.height) - max(a.y, b.y)
+
+    return width * height if width > 0 and height > 0 else 0
+
+
+def get_iou(a: Region, b: Region) -> float:
+    """
+    Returns the intersection over union of the two regions.
+    """
+
+    intersection = get_intersection(a, b)
+    if not intersection:
+        return 0
+
+    return intersection / (
+        a.width * a.height + b.width * b.height - intersection
+    )
+
+
+def is_nested(inner: Region, outer: Region) -> bool:
+    """
+    Returns True if inner lies entirely within outer and its text is part of
+    outer's text (i.e. inner duplicates part of outer).
+    """
+
+    area = inner.width * inner.height
+
+    return (
+        area > 0
+        and get_intersection(inner, outer) == area
+        and inner.text in outer.text
+    )
+
+
+def get_groups(regions: list, iou_threshold: float = 0.5) -> list:
+    """
+    Given a list of regions, returns lists of indices of regions that overlap
+    (transitively) with an IoU of at least iou_threshold, or are nested
+    duplicates of one another (see is_nested).
+    """
+
+    index = GridIndex(regions)
+    parents = list(range(len(regions)))
+
+    def find(i):
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+        return i
+
+    for i, region in enumerate(regions):
+        for j in index.query(region):
+            if j <= i:
+                continue
+
+            other = regions[j]
+            if (
+                get_iou(region, other) >= iou_threshold
+                or is_nested(region, other)
+                or is_nested(other, region)
+            ):
+                parents[find(j)] = find(i)
+
+    groups = {}
+    for i in range(len(regions)):
+        groups.setdefault(find(i), []).append(i)
+
+    return list(groups.values())
+
+
+def merge_group(regions: list) -> Region:
+    """
+    Given a list of overlapping regions, drops those whose text duplicates
+    (part of) another's, keeping the highest scoring one, and merges the
+    remainder into a single region covering all of them, with their texts
+    joined in reading order.
+    """
+
+    regions = sort_regions(regions)
+
+    # Highest scores first, so duplicates keep the best scoring region
+    kept = []
+    for region in sorted(regions, key=lambda x: -x.score):
+        if not any(region.text in x.text for x in kept):
+            kept = [x for x in kept if x.text not in region.text] + [region]
+
+    if len(kept) == 1:
+        return kept[0]
+
+    kept = [x for x in regions if x in kept]
+
+    x0 = min(x.x for x in kept)
+    y0 = min(x.y for x in kept)
+    x1 = max(x.x + x.width for x in kept)
+    y1 = max(x.y + x.height for x in kept)
+
+    return Region(
+        id=kept[0].id,
+        x=x0,
+        y=y0,
+        width=x1 - x0,
+        height=y1 - y0,
+        text="\n".join(x.text for x in kept),
+        score=sum(x.score for x in kept) / len(kept),
+    )
+
+
+def merge_regions(regions: list, iou_threshold: float = 0.5) -> list:
+    """
+    Given a list of regions, merges overlapping regions (with an IoU of at
+    least iou_threshold) and drops duplicated ones (see merge_group). Only
+    candidate pairs found through a GridIndex are compared.
+    """
+
+    return [
+        regions[x[0]] if len(x) == 1 else merge_group([regions[i] for i in x])
+        for x in get_groups(regions, iou_threshold)
+    ]
+
+
+def split_regions(regions: list, vertical: bool = False) -> tuple:
+    """
+    Given a list of regions, splits them into bands separated by empty space
+    along the y axis (or the x axis, if vertical is set). Only gaps at least
+    half as wide as the widest gap are split on, so that e.g. a heading is
+    cut off before the lines of the columns below it. Returns a tuple of the
+    bands, in order, and the widest gap between them.
+    """
+
+    if vertical:
+        start, end = (lambda r: r.x), (lambda r: r.x + r.width)
+    else:
+        start, end = (lambda r: r.y), (lambda r: r.y + r.height)
+
+    ordered = sorted(regions, key=start)
+
+    # Find the gap (if any) in front of each region
+    gaps, reach = [None], end(ordered[0])
+    for region in ordered[1:]:
+        gaps.append(start(region) - reach if start(region) >= reach else None)
+        reach = max(reach, end(region))
+
+    widest_gap = max((x for x in gaps if x is not None), default=None)
+    if widest_gap is None:
+        return [ordered], 0
+
+    bands = []
+    for region, gap in zip(ordered, gaps):
+        if not bands or (gap is not None and gap * 2 >= widest_gap):
+            bands.append([])
+        bands[-1].append(region)
+
+    return bands, widest_gap
+
+
+def sort_regions(regions: list) -> list:
+    """
+    Given a list of regions, returns them in reading order, using a recursive
+    XY-cut: the regions are split into rows or columns at the widest bands of
+    empty space (see split_regions), and each row (top to bottom) or column
+    (left to right) is sorted in turn. Regions that cannot be split are
+    sorted top to bottom, then left to right.
+    """
+
+    if len(regions) <= 1:
+        return list(regions)
+
+    rows, row_gap = split_regions(regions)
+    columns, column_gap = split_regions(regions, vertical=True)
+
+    if len(rows) == 1 and len(columns) == 1:
+        return sorted(regions, key=lambda x: (x.y, x.x))
+
+    if len(columns) == 1 or (len(rows) > 1 and row_gap >= column_gap):
+        bands = rows
+    else:
+        bands = columns
+
+    return [x for band in bands for x in sort_regions(band)]
+
+
+def get_bands(regions: list) -> list:
+    """
+    Given a list of regions, returns lists of indices of the regions in each
+    horizontal band (top to bottom): regions whose vertical extents overlap,
+    such as the words of one line, are always in the same band.
+    """
+
+    order = sorted(range(len(regions)), key=lambda i: regions[i].y)
+
+    bands, reach = [], None
+    for i in order:
+        region = regions[i]
+        if reach is None or region.y >= reach:
+            bands.append([])
+            reach = region.y + region.height
+        bands[-1].append(i)
+        reach = max(reach, region.y + region.height)
+
+    return bands
+
+
+def split_into_parts(
+    regions: list,
+    sizes: list,
+    max_regions: Union[int, None] = None,
+    max_bytes: Union[int, None] = None,
+) -> list:
+    """
+    Given a list of regions and their (serialised) sizes, splits them into
+    parts of at most max_regions regions and max_bytes bytes. Parts are made
+    of whole horizontal bands (see get_bands) where possible; only a band
+    that does not fit into a part by itself is split, left to right. Each
+    part keeps the regions in their original order.
+    """
+
+    def fits(count, size):
+        return (max_regions is None or count <= max_regions) and (
+            max_bytes is None or size <= max_bytes
+        )
+
+    parts, part, part_size = [], [], 0
+    for band in get_bands(regions):
+        band_size = sum(sizes[i] for i in band)
+
+        # Start a new part, unless the band fits into the current one
+        if part and not fits(len(part) + len(band), part_size + band_size):
+            parts.append(part)
+            part, part_size = [], 0
+
+        if fits(len(part) + len(band), part_size + band_size):
+            part, part_size = part + band, part_size + band_size
+            continue
+
+        # The band is too large for a part by itself
+        for i in sorted(band, key=lambda i: regions[i].x):
+            if part and not fits(len(part) + 1, part_size + sizes[i]):
+                parts.append(part)
+                part, part_size = [], 0
+
+            part.append(i)
+            part_size += sizes[i]
+
+    if part or not parts:
+        parts.append(part)
+
+    return [[regions[i] for i in sorted(part)] for part in parts]
+
+
+def process_regions(
+    regions: list,
+    merge_iou: Union[float, None] = None,
+    reading_order: bool = False,
+) -> list:
+    """
+    Optional post-processing of the regions extracted by a converter: if
+    merge_iou is set, overlapping and duplicated regions are merged (see
+    merge_regions) and if reading_order is set, the regions are sorted into
+    reading order (see sort_regions).
+    """
+
+    if merge_iou is not None:
+        regions = merge_regions(regions, merge_iou)
+
+    if reading_order:
+        regions = sort_regions(regions)
+
+    return regions
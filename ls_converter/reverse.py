@@ -0,0 +1,437 @@
+from .errors import ImageSizeNotSet, NoSuchConverter
+from .meta import Input, Levels
+from .utils import Region
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
+from typing import Callable, Iterator, Union
+from urllib.parse import parse_qs, urlparse
+from xml.etree.ElementTree import Element, SubElement, indent, tostring
+
+import json
+
+
+ALTO_NAMESPACE = "http://www.loc.gov/standards/alto/ns-v4#"
+TSV_COLUMNS = [
+    "level",
+    "page_num",
+    "block_num",
+    "par_num",
+    "line_num",
+    "word_num",
+    "left",
+    "top",
+    "width",
+    "height",
+    "conf",
+    "text",
+]
+
+
+def iter_export(
+    path: Union[str, Path], chunk_size: int = 1 << 16
+) -> Iterator[dict]:
+    """
+    Given a path to a Label Studio JSON export (a list of tasks) or a JSONL
+    file (one task per line), this function yields one task at a time,
+    without loading the whole export into memory.
+    """
+
+    decoder = json.JSONDecoder()
+
+    with open(path, encoding="utf-8") as f:
+        buffer, pos, eof = "", 0, False
+
+        while True:
+            # Skip whitespace and the list's brackets and commas
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,[]":
+                pos += 1
+
+            if pos == len(buffer):
+                if eof:
+                    return
+
+                buffer, pos = f.read(chunk_size), 0
+                eof = not buffer
+                continue
+
+            try:
+                task, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+
+                # Incomplete task: read (at least) as much again and retry
+                chunk = f.read(max(chunk_size, len(buffer) - pos))
+                buffer, pos = buffer[pos:] + chunk, 0
+                eof = not chunk
+                continue
+
+            yield task
+
+
+def get_export_results(task: dict) -> list:
+    """
+    Given a Label Studio task, returns the results of its latest annotation
+    that was not cancelled or, if there is none, of its first prediction.
+    """
+
+    # An annotation with an empty result is final, too: all of the page's
+    # regions were deleted
+    for annotation in reversed(task.get("annotations") or []):
+        if not annotation.get("was_cancelled") and "result" in annotation:
+            return annotation["result"] or []
+
+    for prediction in task.get("predictions") or []:
+        return prediction.get("result") or []
+
+    return []
+
+
+def get_export_url(task: dict) -> str:
+    """
+    Given a Label Studio task, returns the URL of its image.
+    """
+
+    data = task.get("data") or {}
+
+    if "ocr" in data:
+        return data["ocr"]
+
+    return next(iter(data.values()), "")
+
+
+def merge_parts(parts: list) -> dict:
+    """
+    Given the tasks a page was split into (see
+    LabelStudioConverter.build_task), in part order, returns a single task
+    for the page, with the page's data (without the part numbers) and the
+    results of all parts (see get_export_results) as its annotation.
+    """
+
+    data = {
+        key: value
+        for key, value in parts[0]["data"].items()
+        if key not in ["part", "parts"]
+    }
+
+    results = [x for task in parts for x in get_export_results(task)]
+
+    task = {"data": data, "annotations": [{"result": results}]}
+    if "id" in parts[0]:
+        task["id"] = parts[0]["id"]
+
+    return task
+
+
+def iter_pages(tasks: Iterator[dict]) -> Iterator[dict]:
+    """
+    Given Label Studio tasks, yields one task per page, putting pages split
+    into several tasks back together (see merge_parts) as soon as all their
+    parts have been seen. Parts without the number of parts in their data
+    are put back together at the end.
+    """
+
+    pages = {}
+    for task in tasks:
+        data = task.get("data") or {}
+        if "part" not in data:
+            yield task
+            continue
+
+        # Parts of the same page share the image URL and page number
+        key = (get_export_url(task), data.get("page"))
+        parts = pages.setdefault(key, {})
+        parts[data["part"]] = task
+
+        if len(parts) == data.get("parts"):
+            yield merge_parts([x for _, x in sorted(pages.pop(key).items())])
+
+    for parts in pages.values():
+        yield merge_parts([x for _, x in sorted(parts.items())])
+
+
+def get_export_name(url: str) -> str:
+    """
+    Given a task's image URL, returns the image's stem, to name the files
+    written for it after. For Label Studio local storage URLs (such as
+    /data/local-files/?d=scans/p1.jpg), the path in the d parameter is used.
+    """
+
+    url = urlparse(url)
+
+    path = parse_qs(url.query).get("d", [url.path])[0]
+
+    return PurePosixPath(path).stem
+
+
+def get_export_regions(
+    task: dict, image_size: Union[Callable, None] = None
+) -> tuple:
+    """
+    Given a Label Studio task, pairs its `rectangle` and `textarea` results by
+    region ID and returns a tuple of (regions, image_width, image_height) with
+    the regions (see utils.Region) converted back to pixel coordinates.
+
+    The image size is taken from the results' original_width/original_height
+    (as stored in Label Studio exports). If these are missing, image_size is
+    called with the task's URL and should return a (width, height) tuple.
+    """
+
+    results = get_export_results(task)
+
+    # Pair results by region ID, keeping the order they first appear in
+    bboxes, texts, scores, sizes = {}, {}, {}, {}
+    for result in results:
+        value = result.get("value") or {}
+        if result.get("type") not in ["rectangle", "textarea"]:
+            continue
+
+        if "x" in value:
+            bboxes.setdefault(result["id"], value)
+
+        if result["type"] == "textarea":
+            texts[result["id"]] = value.get("text") or []
+            scores[result["id"]] = result.get("score") or 0
+
+        if result.get("original_width") and result.get("original_height"):
+            sizes[result["id"]] = (
+                result["original_width"],
+                result["original_height"],
+            )
+
+    url = get_export_url(task)
+
+    if sizes:
+        image_width, image_height = next(iter(sizes.values()))
+    elif image_size is not None:
+        image_width, image_height = image_size(url)
+    elif not bboxes:
+        image_width, image_height = 0, 0
+    else:
+        raise ImageSizeNotSet(url)
+
+    regions = []
+    for region_id, bbox in bboxes.items():
+        regions.append(
+            Region(
+                id=region_id,
+                x=round(bbox["x"] * image_width / 100),
+                y=round(bbox["y"] * image_height / 100),
+                width=round(bbox["width"] * image_width / 100),
+                height=round(bbox["height"] * image_height / 100),
+                text="\n".join(texts.get(region_id, [])),
+                score=scores.get(region_id, 0),
+            )
+        )
+
+    return regions, image_width, image_height
+
+
+def regions_to_alto(
+    regions: list,
+    image_width: int,
+    image_height: int,
+    filename: str = "",
+    page_num: int = 1,
+) -> str:
+    """
+    Given a list of regions (see utils.Region), the image size and its page
+    number, returns an ALTO XML document with one TextBlock per region, one
+    TextLine per line of text and one String per word: the inverse of
+    TranskribusConverter. Line and word coordinates are not stored in Label
+    Studio, so each region's height is divided evenly between its lines.
+    """
+
+    alto = Element("alto", xmlns=ALTO_NAMESPACE)
+
+    description = SubElement(alto, "Description")
+    SubElement(description, "MeasurementUnit").text = "pixel"
+    SubElement(
+        SubElement(description, "sourceImageInformation"), "fileName"
+    ).text = filename
+
+    page = SubElement(
+        SubElement(alto, "Layout"),
+        "Page",
+        ID=f"page_{page_num}",
+        PHYSICAL_IMG_NR=str(page_num),
+        WIDTH=str(image_width),
+        HEIGHT=str(image_height),
+    )
+    print_space = SubElement(
+        page,
+        "PrintSpace",
+        HPOS="0",
+        VPOS="0",
+        WIDTH=str(image_width),
+        HEIGHT=str(image_height),
+    )
+
+    for region in regions:
+        lines = region.text.split("\n") if region.text else []
+        line_height = region.height // len(lines) if lines else 0
+
+        # IDs are prefixed, as region IDs may start with a digit, which is
+        # not a valid xsd:ID
+        block = SubElement(
+            print_space,
+            "TextBlock",
+            ID=f"block_{region.id}",
+            HPOS=str(region.x),
+            VPOS=str(region.y),
+            WIDTH=str(region.width),
+            HEIGHT=str(region.height),
+        )
+
+        for i, line in enumerate(lines):
+            text_line = SubElement(
+                block,
+                "TextLine",
+                ID=f"line_{region.id}_{i}",
+                HPOS=str(region.x),
+                VPOS=str(region.y + i * line_height),
+                WIDTH=str(region.width),
+                HEIGHT=str(line_height),
+            )
+
+            for j, word in enumerate(line.split()):
+                if j:
+                    SubElement(text_line, "SP")
+                SubElement(
+                    text_line, "String", CONTENT=word, WC=str(region.score)
+                )
+
+    indent(alto)
+
+    return tostring(alto, encoding="unicode", xml_declaration=True)
+
+
+def regions_to_tsv(regions: list, page_num: int = 1) -> str:
+    """
+    Given a list of regions (see utils.Region), returns Tesseract TSV output
+    with one block row per region and one word row per word: the inverse of
+    TesseractConverter. Word coordinates are not stored in Label Studio, so
+    each word row carries its region's coordinates.
+    """
+
+    rows = ["\t".join(TSV_COLUMNS)]
+    for block_num, region in enumerate(regions, start=1):
+        bbox = [region.x, region.y, region.width, region.height]
+        conf = round(region.score * 100, 2)
+
+        rows.append(
+            "\t".join(
+                str(x)
+                for x in [Levels.block_num, page_num, block_num, 0, 0, 0]
+                + bbox
+                + [-1, ""]
+            )
+        )
+
+        for line_num, line in enumerate(region.text.split("\n"), start=1):
+            for word_num, word in enumerate(line.split(), start=1):
+                rows.append(
+                    "\t".join(
+                        str(x)
+                        for x in [Levels.word_num, page_num, block_num, 1]
+                        + [line_num, word_num]
+                        + bbox
+                        + [conf, word]
+                    )
+                )
+
+    return "\n".join(rows) + "\n"
+
+
+def write_page(
+    task: dict,
+    path: Path,
+    output_format: str = Input.TRANSKRIBUS,
+    image_size: Union[Callable, None] = None,
+) -> Path:
+    """
+    Given a Label Studio task and a path, writes the task as ALTO XML (for
+    output_format Input.TRANSKRIBUS) or Tesseract TSV (for output_format
+    Input.TESSERACT) to the path, as the page in the task's data (for pages
+    of multi-page images) or page 1. Returns the path when finished.
+    """
+
+    regions, image_width, image_height = get_export_regions(task, image_size)
+    page_num = (task.get("data") or {}).get("page", 1)
+
+    if output_format == Input.TRANSKRIBUS:
+        contents = regions_to_alto(
+            regions, image_width, image_height, get_export_url(task), page_num
+        )
+    elif output_format == Input.TESSERACT:
+        contents = regions_to_tsv(regions, page_num)
+    else:
+        raise NoSuchConverter()
+
+    path.write_text(contents, encoding="utf-8")
+
+    return path
+
+
+def convert_export(
+    path: Union[str, Path],
+    output_dir: Union[str, Path],
+    output_format: str = Input.TRANSKRIBUS,
+    image_size: Union[Callable, None] = None,
+    workers: int = 4,
+) -> list:
+    """
+    Given a path to a Label Studio export, stream-parses it and writes one
+    ALTO XML file (output_format Input.TRANSKRIBUS) or Tesseract TSV file
+    (output_format Input.TESSERACT) per page into output_dir, named after
+    the task's image (see get_export_name) and, for pages of multi-page
+    images, the page number. Pages split into several tasks are written as
+    a single file (see iter_pages). Returns the list of paths written, in
+    export order.
+
+    Pages are written by a pool of worker threads, so that image_size calls
+    (which may well fetch the image) and writes overlap. Building the
+    output itself holds the GIL, so it does not run in parallel.
+
+    (See get_export_regions for image_size.)
+    """
+
+    if output_format not in [Input.TRANSKRIBUS, Input.TESSERACT]:
+        raise NoSuchConverter()
+
+    suffix = ".xml" if output_format == Input.TRANSKRIBUS else ".tsv"
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    written, pending, used_names = [], [], set()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for i, task in enumerate(iter_pages(iter_export(path))):
+            # Name the file after the image, making sure names are unique
+            stem = get_export_name(get_export_url(task))
+            if "page" in (task.get("data") or {}):
+                stem = f"{stem}-page-{task['data']['page']}"
+            name, n = stem or str(task.get("id", i)), 1
+            while name in used_names:
+                name, n = f"{stem}-{n}", n + 1
+            used_names.add(name)
+
+            pending.append(
+                executor.submit(
+                    write_page,
+                    task,
+                    output_dir / f"{name}{suffix}",
+                    output_format,
+                    image_size,
+                )
+            )
+
+            # Keep the number of tasks held in memory bounded
+            if len(pending) >= workers * 2:
+                written.append(pending.pop(0).result())
+
+        written.extend(x.result() for x in pending)
+
+    return written
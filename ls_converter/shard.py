@@ -0,0 +1,248 @@
+from . import LabelStudioConverter
+from .errors import ShardIncorrect, ShardMismatch
+from .meta import Input, Output
+
+from heapq import merge
+from pathlib import Path
+from typing import Iterator, Union
+
+import hashlib
+import json
+
+
+def parse_shard(shard: str) -> tuple:
+    """
+    Given a shard as a string "i/N" (the i-th of N shards, counting from 1),
+    returns it as a tuple of integers (i, N).
+    """
+
+    try:
+        i, n = [int(x) for x in shard.split("/")]
+    except ValueError:
+        raise ShardIncorrect(shard)
+
+    if not 1 <= i <= n:
+        raise ShardIncorrect(shard)
+
+    return i, n
+
+
+def get_shard(key: str, shards: int) -> int:
+    """
+    Given a key (an image path or URL) and the number of shards, returns the
+    shard (counting from 1) the key belongs to. This uses a stable hash, so
+    the result is the same on every machine and in every run.
+    """
+
+    digest = hashlib.sha1(key.encode("utf-8")).digest()
+
+    return int.from_bytes(digest[:8], "big") % shards + 1
+
+
+def iter_manifest(path: Union[str, Path]) -> Iterator[tuple]:
+    """
+    Given a path to a manifest, a JSONL file with one item per line of the
+    form {"image": ..., "input_data": ..., "url": ...} (where url is
+    optional), yields (index, item) tuples in manifest order.
+    """
+
+    with open(path, encoding="utf-8") as f:
+        index = 0
+        for line in f:
+            if not line.strip():
+                continue
+
+            yield index, json.loads(line)
+            index += 1
+
+
+def get_manifest_hash(path: Union[str, Path]) -> str:
+    """
+    Returns the SHA-1 hash of the manifest's contents, used to make sure only
+    shards of the same manifest are merged.
+    """
+
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def convert_shard(
+    manifest: Union[str, Path],
+    output_dir: Union[str, Path],
+    shard: str = "1/1",
+    input_format: str = Input.TESSERACT,
+    **kwargs,
+) -> Path:
+    """
+    Given a manifest (see iter_manifest) and a shard "i/N", converts the
+    manifest items belonging to the shard (see get_shard) and writes them,
+    one task per line and in manifest order, to tasks-i-of-N.jsonl in
+    output_dir, alongside a shard manifest (manifest-i-of-N.json) recording
+    which manifest items were converted or failed. Returns the path of the
+    shard manifest.
+    """
+
+    i, n = parse_shard(shard)
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    tasks_path = output_dir / f"tasks-{i}-of-{n}.jsonl"
+    shard_path = output_dir / f"manifest-{i}-of-{n}.json"
+
+    converter = LabelStudioConverter(input_format=input_format)
+
+    total, converted, failed = 0, [], []
+    with open(tasks_path, "wb") as f:
+        for index, item in iter_manifest(manifest):
+            total += 1
+
+            # Items without an image or URL (or that are not even objects)
+            # fail in the shard their index belongs to
+            key = (
+                (item.get("url") or item.get("image"))
+                if isinstance(item, dict)
+                else None
+            )
+            if not isinstance(key, str):
+                key = f"#{index}"
+
+            if get_shard(key, n) != i:
+                continue
+
+            try:
+                task = converter.convert(
+                    image=item["image"],
+                    input_data=item["input_data"],
+                    url=item.get("url"),
+                    output=Output.BYTES,
+                    **kwargs,
+                )
+            except Exception as e:
+                failed.append([index, f"{e!r}"])
+                continue
+
+            # Pages split into several tasks come as a list, with one line
+            # (and one entry in converted) per task
+            for part in task if isinstance(task, list) else [task]:
+                f.write(part + b"\n")
+                converted.append(index)
+
+    shard_path.write_text(
+        json.dumps(
+            {
+                "shard": i,
+                "shards": n,
+                "manifest": get_manifest_hash(manifest),
+                "total": total,
+                "tasks": tasks_path.name,
+                "converted": converted,
+                "failed": failed,
+            }
+        )
+    )
+
+    return shard_path
+
+
+def iter_shard_tasks(shard_path: Path, shard: dict) -> Iterator[tuple]:
+    """
+    Given a shard manifest's path and contents, yields (index, task) tuples
+    for the shard's tasks, checking that there is one task per converted
+    manifest item.
+    """
+
+    lines = 0
+    with open(shard_path.parent / shard["tasks"], "rb") as f:
+        for index, line in zip(shard["converted"], f):
+            lines += 1
+            yield index, line.rstrip(b"\n")
+
+        if lines != len(shard["converted"]) or f.readline():
+            raise ShardMismatch(
+                f"Shard {shard['shard']} tasks do not match its manifest."
+            )
+
+
+def merge_shards(
+    shards_dir: Union[str, Path], output: Union[str, Path]
+) -> dict:
+    """
+    Given a directory with the outputs of all shards (see convert_shard),
+    verifies that all shards of the same manifest are present and that every
+    manifest item was converted (or failed) exactly once, and writes the
+    tasks in original manifest order to output: as JSONL if its suffix is
+    .jsonl, and as a JSON list otherwise. Returns a summary with the number
+    of tasks written and the failed items.
+    """
+
+    shards_dir = Path(shards_dir)
+
+    shards = {}
+    for path in sorted(shards_dir.glob("manifest-*-of-*.json")):
+        shard = json.loads(path.read_text())
+        shards[shard["shard"]] = (path, shard)
+
+    if not shards:
+        raise ShardMismatch(f"No shard manifests found in {shards_dir}.")
+
+    # All shards must be of the same manifest, and all must be present
+    first = next(iter(shards.values()))[1]
+    for _, shard in shards.values():
+        for key in ["shards", "manifest", "total"]:
+            if shard[key] != first[key]:
+                raise ShardMismatch(
+                    f"Shard {shard['shard']} has a different {key}."
+                )
+
+    missing_shards = set(range(1, first["shards"] + 1)) - set(shards)
+    if missing_shards:
+        raise ShardMismatch(f"Missing shards: {sorted(missing_shards)}.")
+
+    # Every manifest item must have been converted or failed exactly once
+    seen = [0 for _ in range(first["total"])]
+    failed = []
+    for _, shard in shards.values():
+        for index in set(shard["converted"]):
+            seen[index] += 1
+        for index, error in shard["failed"]:
+            seen[index] += 1
+            failed.append([index, error])
+
+    lost = [i for i, x in enumerate(seen) if x == 0]
+    duplicated = [i for i, x in enumerate(seen) if x > 1]
+    if lost or duplicated:
+        raise ShardMismatch(
+            f"Lost items: {lost[:10]}; duplicated items: {duplicated[:10]}."
+        )
+
+    # Each shard's tasks are in manifest order, so merging them is streaming
+    tasks = merge(
+        *[iter_shard_tasks(path, shard) for path, shard in shards.values()],
+        key=lambda x: x[0],
+    )
+
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    written = 0
+    with open(output, "wb") as f:
+        as_jsonl = output.suffix == ".jsonl"
+        if not as_jsonl:
+            f.write(b"[")
+
+        for _, task in tasks:
+            if as_jsonl:
+                f.write(task + b"\n")
+            else:
+                f.write((b", " if written else b"") + task)
+            written += 1
+
+        if not as_jsonl:
+            f.write(b"]")
+
+    return {"tasks": written, "failed": sorted(failed)}
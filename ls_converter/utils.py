@@ -1,5 +1,6 @@
 from .errors import (
     ExpatError,
+    IncorrectImageFormat,
     NotAnInteger,
     RequirePyTesseract,
     UnexpectedHTTPResponse,
@@ -8,16 +9,21 @@ from .errors import (
 )
 
 from io import BytesIO
-from pathlib import Path
+from pathlib import Path, PurePosixPath
 from PIL import Image
 from uuid import uuid4
-from typing import Union
+from typing import NamedTuple, Union
 
 import json
 import requests
+import threading
 import xmltodict
 
 
+IMAGE_SUFFIXES = [".jpg", ".jpeg", ".png", ".tif", ".tiff", ".jp2"]
+DATA_SUFFIXES = [".json", ".xml"]
+
+
 def url_to_tesseract_data(
     url: str,
     config: dict = {
@@ -38,11 +44,9 @@ def url_to_tesseract_data(
     except ImportError:
         raise RequirePyTesseract()
 
-    # Download image
-    image = url_to_image(url)
-
-    # Return Tesseract's interpretation of the image
-    return image_to_data(image, output_type=Output.DICT, **config)
+    # Download image, and return Tesseract's interpretation of it
+    with ImageSource(url) as source:
+        return image_to_data(source.image, output_type=Output.DICT, **config)
 
 
 def url_to_image(url: str, fail: bool = False) -> Union[Image.Image, str]:
@@ -209,6 +213,109 @@ def get_id(length: Union[int, str] = 10) -> str:
     return str(uuid4())[:length]
 
 
+class Region(NamedTuple):
+    """
+    A single OCR region, in pixel coordinates, as extracted by a converter
+    before it is formatted for Label Studio (see get_task).
+    """
+
+    id: str
+    x: int
+    y: int
+    width: int
+    height: int
+    text: str
+    score: float
+
+
+def get_task(
+    regions: list,
+    image_width: Union[int, str],
+    image_height: Union[int, str],
+    url: Union[str, None] = None,
+    data: Union[dict, None] = None,
+) -> dict:
+    """
+    Given a list of regions (see Region), the total image width and image
+    height, and a URL, this function returns a dictionary with the task
+    correctly formatted for Label Studio, with one bbox and one transcription
+    result per region and the average of all region scores as the score. Any
+    data is added to the task's data alongside the URL.
+
+    (See also serialise.get_task_bytes.)
+    """
+
+    results, all_scores = [], []
+
+    for region in regions:
+        bbox = get_bbox(
+            x=region.x,
+            y=region.y,
+            width=region.width,
+            height=region.height,
+            image_width=image_width,
+            image_height=image_height,
+        )
+
+        # Extend/append all results and scores
+        results.extend(
+            [
+                get_bbox_result(region.id, bbox),
+                get_transcription_result(
+                    region.id, bbox, region.text, score=region.score
+                ),
+            ]
+        )
+        all_scores.append(region.score)
+
+    score = sum(all_scores) / len(all_scores) if all_scores else 0
+
+    return {
+        "data": dict({"ocr": url}, **(data or {})),
+        "predictions": [
+            {
+                "result": results,
+                "score": score,
+            }
+        ],
+    }
+
+
+def as_list(value: Union[list, dict, None]) -> list:
+    """
+    Given an element parsed by xmltodict, which gives a single child element
+    as a dict (and a missing one as None) rather than a list, returns it as a
+    list of elements.
+    """
+
+    if value is None:
+        return []
+
+    if isinstance(value, list):
+        return value
+
+    return [value]
+
+
+def split_pages(input_data: dict) -> dict:
+    """
+    Given PyTesseract's image_to_data dict response, returns a dictionary
+    with one such dict per page, keyed by page number, in a single pass over
+    the rows.
+    """
+
+    pages = {}
+    for i, page_num in enumerate(input_data["page_num"]):
+        if page_num not in pages:
+            pages[page_num] = {key: [] for key in input_data.keys()}
+
+        page = pages[page_num]
+        for key, values in input_data.items():
+            page[key].append(values[i])
+
+    return pages
+
+
 def open_image(image_path: str, fail: bool = False) -> Union[Image.Image, str]:
     """
     Given an image_path, this function will ensure that the file exists, and
@@ -230,12 +337,144 @@ def open_image(image_path: str, fail: bool = False) -> Union[Image.Image, str]:
         raise UnidentifiedImageError(f"Unable to open image {image_path}")
 
 
-def load_contents(path: Path) -> str:
+class ImagePool:
+    """
+    Bounds the number of images held open at once by ImageSource objects,
+    across threads: opening an image while `size` are already open blocks
+    until one of them is closed.
+    """
+
+    def __init__(self, size: int = 64):
+        self.size = size
+        self.open = 0
+        self.condition = threading.Condition()
+
+    def acquire(self) -> None:
+        with self.condition:
+            self.condition.wait_for(lambda: self.open < self.size)
+            self.open += 1
+
+    def release(self) -> None:
+        with self.condition:
+            self.open -= 1
+            self.condition.notify()
+
+    def resize(self, size: int) -> None:
+        with self.condition:
+            self.size = size
+            self.condition.notify_all()
+
+
+IMAGE_POOL = ImagePool()
+
+
+class ImageSource:
+    """
+    Managed handle for an image given as a path, a URL, bytes or a PIL.Image
+    object. The image is opened (which only reads its header) when the
+    context is entered, taking a slot in the pool (see ImagePool), and closed
+    when it is left, dropping any downloaded contents. Its size and filename
+    stay available once it is closed, so nothing has to hold on to the image
+    itself.
+
+    Contexts can be nested, and the image is only closed when the outermost
+    one is left. PIL.Image objects belong to the caller and are left open,
+    back on the frame they were on when the context was entered.
+    """
+
+    def __init__(
+        self,
+        image: Union[Image.Image, str, bytes],
+        pool: ImagePool = IMAGE_POOL,
+    ):
+        self.source = image
+        self.pool = pool
+        self.image = None
+        self.depth = 0
+        self.frame = 0
+        self.size = getattr(image, "size", None)
+        self.filename = (
+            image if isinstance(image, str) else getattr(image, "filename", "")
+        )
+
+    def open(self) -> "ImageSource":
+        if self.depth == 0:
+            if isinstance(self.source, Image.Image):
+                self.image = self.source
+                self.frame = self.image.tell()
+            else:
+                self.image = self.open_image()
+
+            self.size = self.image.size
+
+        self.depth += 1
+
+        return self
+
+    def open_image(self) -> Image.Image:
+        if not isinstance(self.source, (str, bytes)):
+            raise IncorrectImageFormat()
+
+        self.pool.acquire()
+        try:
+            if isinstance(self.source, bytes):
+                return Image.open(BytesIO(self.source))
+            if self.source.startswith("http"):
+                return url_to_image(self.source, fail=True)
+
+            return open_image(self.source, fail=True)
+        except UnidentifiedImageError:
+            self.pool.release()
+            raise IncorrectImageFormat(
+                f"Unable to open image {self.filename or '(bytes)'}."
+            )
+        except BaseException:
+            self.pool.release()
+            raise
+
+    def close(self) -> None:
+        if self.depth == 0:
+            return
+
+        self.depth -= 1
+        if self.depth == 0:
+            if self.image is not self.source:
+                self.image.close()
+                self.pool.release()
+            elif self.image.tell() != self.frame:
+                self.image.seek(self.frame)
+
+            self.image = None
+
+    def seek(self, frame: int) -> None:
+        """
+        Moves an open image to the given frame (counting from 0), reading
+        only the frame's header, and updates the size to the frame's.
+        """
+
+        if self.image is None:
+            raise ValueError("Image must be open to seek.")
+
+        self.image.seek(frame)
+        self.size = self.image.size
+
+    def __enter__(self) -> "ImageSource":
+        return self.open()
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+def load_contents(path: Union[Path, str]) -> str:
     """
     Given a path, ensures that the path exists and returns the plain text from
     the path.
     """
 
+    # Make path into Path object
+    if isinstance(path, str):
+        path = Path(path)
+
     # Check if path exists
     if not path.exists():
         raise FileNotFoundError(f"File could not be found: {path}.")
@@ -291,11 +530,59 @@ def load_xml_as_json(path: str, fail: bool = False) -> Union[dict, str]:
         raise ExpatError(f"XML could not be loaded from {path}.")
 
 
-def save_json(data: Union[dict, list], path: str) -> True:
+def pair_files(
+    names: list,
+    image_suffixes: list = IMAGE_SUFFIXES,
+    data_suffixes: list = DATA_SUFFIXES,
+) -> list:
+    """
+    Given a list of file names (paths or archive member names), this function
+    pairs each image with the OCR data file sharing its stem and returns a
+    sorted list of (image, data) tuples. A data file in the same directory as
+    the image is preferred, then one in a subdirectory of the image's
+    directory (as in Transkribus exports). Images without data are skipped.
+    """
+
+    images, data = [], {}
+    for name in names:
+        suffix = PurePosixPath(name).suffix.lower()
+        if suffix in image_suffixes:
+            images.append(name)
+        elif suffix in data_suffixes:
+            data.setdefault(PurePosixPath(name).stem, []).append(name)
+
+    pairs = []
+    for image in sorted(images):
+        image_path = PurePosixPath(image)
+        candidates = data.get(image_path.stem, [])
+
+        same_dir = [
+            x
+            for x in candidates
+            if PurePosixPath(x).parent == image_path.parent
+        ]
+        sub_dir = [
+            x
+            for x in candidates
+            if image_path.parent in PurePosixPath(x).parents
+        ]
+
+        if same_dir:
+            pairs.append((image, same_dir[0]))
+        elif sub_dir:
+            pairs.append((image, sorted(sub_dir)[0]))
+        elif len(candidates) == 1:
+            pairs.append((image, candidates[0]))
+
+    return pairs
+
+
+def save_json(data: Union[dict, list, bytes], path: str) -> True:
     """
     Given a dictionary or list (data) and a path, this function will ensure
     that the parent directory exists, and that the data passed will be saved
-    as a JSON file in the path provided.
+    as a JSON file in the path provided. Data that is already serialised to
+    bytes (see serialise.get_task_bytes) is written as is.
 
     Returns True when finished.
     """
@@ -311,6 +598,9 @@ def save_json(data: Union[dict, list], path: str) -> True:
     path.parent.mkdir(parents=True, exist_ok=True)
 
     # Write JSON to path
-    path.write_text(json.dumps(data))
+    if isinstance(data, bytes):
+        path.write_bytes(data)
+    else:
+        path.write_text(json.dumps(data))
 
     return True
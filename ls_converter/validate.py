@@ -0,0 +1,329 @@
+from . import ABBYYConverter, TesseractConverter, TranskribusConverter
+from .errors import (
+    IncorrectlyFormattedInputData,
+    NoSuchConverter,
+    UnexpectedHTTPResponse,
+    UnidentifiedImageError,
+)
+from .meta import Input
+from .shard import iter_manifest
+from .utils import as_list, set_int
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from PIL import Image, ImageFile
+from typing import Union
+from xml.etree.ElementTree import iterparse
+
+import json
+import requests
+
+
+TESSERACT_KEYS = [
+    "level",
+    "page_num",
+    "block_num",
+    "left",
+    "top",
+    "width",
+    "height",
+    "conf",
+    "text",
+]
+
+TEXTBLOCK_PATH = ["alto", "Layout", "Page", "PrintSpace", "TextBlock"]
+TEXTBLOCK_ATTRIBUTES = ["HPOS", "VPOS", "WIDTH", "HEIGHT"]
+STRING_PATH = TEXTBLOCK_PATH + ["TextLine", "String"]
+
+
+def validate_image(image: str) -> True:
+    """
+    Given a path or URL to an image, checks that it exists and that its
+    header can be read as an image, without reading (or downloading) the
+    image data itself.
+    """
+
+    if image.startswith("http"):
+        with requests.get(image, stream=True, timeout=30) as response:
+            if response.status_code != 200:
+                raise UnexpectedHTTPResponse(image)
+
+            # Feed the start of the body to a parser until it has the header
+            parser = ImageFile.Parser()
+            for chunk in response.iter_content(1 << 14):
+                parser.feed(chunk)
+                if parser.image:
+                    return True
+
+            raise UnidentifiedImageError(f"Unable to load image from {image}")
+
+    if not Path(image).exists():
+        raise FileNotFoundError(image)
+
+    # Opening an image only reads its header
+    with Image.open(image):
+        return True
+
+
+def get_local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def validate_transkribus(path: str) -> True:
+    """
+    Given a path to Transkribus ALTO XML, checks (without building the whole
+    document in memory) that it has a single Page, with TextBlock elements
+    inside its PrintSpace, each with the integer coordinates and each String
+    with the CONTENT that TranskribusConverter relies on.
+    """
+
+    stack, pages, textblocks = [], 0, 0
+    for event, element in iterparse(path, events=["start", "end"]):
+        if event == "start":
+            stack.append(get_local_name(element.tag))
+
+            if stack == ["alto", "Layout", "Page"]:
+                pages += 1
+            elif stack == TEXTBLOCK_PATH:
+                textblocks += 1
+                for key in TEXTBLOCK_ATTRIBUTES:
+                    try:
+                        int(element.get(key))
+                    except (TypeError, ValueError):
+                        raise IncorrectlyFormattedInputData(
+                            f"TextBlock {textblocks} has no integer {key}."
+                        )
+            elif stack == STRING_PATH and element.get("CONTENT") is None:
+                raise IncorrectlyFormattedInputData(
+                    f"String in TextBlock {textblocks} has no CONTENT."
+                )
+        else:
+            stack.pop()
+            element.clear()
+
+    if pages != 1:
+        raise IncorrectlyFormattedInputData(
+            f"Expected a single Page, found {pages}."
+        )
+
+    if not textblocks:
+        raise IncorrectlyFormattedInputData(
+            "It it valid output from Transkribus?"
+        )
+
+    return True
+
+
+def is_integer(value) -> bool:
+    try:
+        set_int(value)
+    except (TypeError, ValueError):
+        return False
+
+    return not isinstance(value, bool)
+
+
+def validate_transkribus_data(input_data: dict) -> True:
+    """
+    Given Transkribus ALTO XML already parsed with xmltodict, makes the same
+    checks as validate_transkribus.
+    """
+
+    try:
+        TranskribusConverter.assertion(input_data, None, None)
+
+        page = input_data["alto"]["Layout"]["Page"]
+        if not isinstance(page, dict):
+            raise IncorrectlyFormattedInputData(
+                f"Expected a single Page, found {len(as_list(page))}."
+            )
+
+        textblocks = as_list(page["PrintSpace"]["TextBlock"])
+        if not textblocks:
+            raise IncorrectlyFormattedInputData(
+                "It it valid output from Transkribus?"
+            )
+
+        for i, block in enumerate(textblocks, start=1):
+            for key in TEXTBLOCK_ATTRIBUTES:
+                if not is_integer(block.get(f"@{key}")):
+                    raise IncorrectlyFormattedInputData(
+                        f"TextBlock {i} has no integer {key}."
+                    )
+
+            for line in as_list(block.get("TextLine")):
+                for string in as_list(line.get("String")):
+                    if string.get("@CONTENT") is None:
+                        raise IncorrectlyFormattedInputData(
+                            f"String in TextBlock {i} has no CONTENT."
+                        )
+    except (AttributeError, KeyError, TypeError) as e:
+        raise IncorrectlyFormattedInputData(f"Missing {e!r}.")
+
+    return True
+
+
+def validate_abbyy(input_data: dict) -> True:
+    """
+    Given ABBYY input data, runs ABBYYConverter's checks and makes sure every
+    block has an id, integer coordinates and a numeric confidence, and that
+    every paragraph has a text and role and refers to existing blocks.
+    """
+
+    try:
+        ABBYYConverter.assertion(input_data, None, None)
+
+        blocks = set()
+        for block in input_data["layout"]["pages"][0]["texts"]:
+            for key in ["l", "t", "r", "b"]:
+                if not is_integer(block["position"][key]):
+                    raise IncorrectlyFormattedInputData(
+                        f"Block {block['id']} has no integer position {key}."
+                    )
+
+            confidence = block["confidence"]
+            if isinstance(confidence, bool) or not isinstance(
+                confidence, (int, float)
+            ):
+                raise IncorrectlyFormattedInputData(
+                    f"Block {block['id']} has no numeric confidence."
+                )
+
+            blocks.add(block["id"])
+
+        for paragraph in input_data["content"]["paragraphs"]:
+            if not isinstance(paragraph["text"], str):
+                raise IncorrectlyFormattedInputData(
+                    "Paragraph text is not a string."
+                )
+            if "role" not in paragraph:
+                raise IncorrectlyFormattedInputData("Paragraph has no role.")
+
+            for reference in paragraph["layoutReferences"]:
+                if reference["blockId"] not in blocks:
+                    raise IncorrectlyFormattedInputData(
+                        f"Paragraph refers to unknown block "
+                        f"{reference['blockId']}."
+                    )
+    except (KeyError, IndexError, TypeError) as e:
+        raise IncorrectlyFormattedInputData(f"Missing {e!r}.")
+
+    return True
+
+
+def validate_tesseract(input_data: dict, **kwargs) -> True:
+    """
+    Given Tesseract input data, runs TesseractConverter's checks and makes
+    sure all required columns are present and of the same length.
+    """
+
+    TesseractConverter.assertion(input_data, None, None, **kwargs)
+
+    missing = [x for x in TESSERACT_KEYS if x not in input_data]
+    if missing:
+        raise IncorrectlyFormattedInputData(f"Missing columns {missing}.")
+
+    if len({len(input_data[x]) for x in TESSERACT_KEYS}) > 1:
+        raise IncorrectlyFormattedInputData("Columns differ in length.")
+
+    return True
+
+
+def validate_input_data(
+    input_data: Union[str, dict],
+    input_format: str = Input.TESSERACT,
+    **kwargs,
+) -> True:
+    """
+    Given input data, or a path to it, checks that it can be read and has
+    the structure the converter for input_format expects.
+    """
+
+    if isinstance(input_data, dict):
+        data = input_data
+    elif not isinstance(input_data, str):
+        raise IncorrectlyFormattedInputData("Expected a path or an object.")
+    elif not Path(input_data).exists():
+        raise FileNotFoundError(input_data)
+    elif input_format == Input.TRANSKRIBUS:
+        return validate_transkribus(input_data)
+    else:
+        with open(input_data, encoding="utf-8") as f:
+            data = json.load(f)
+
+    if not isinstance(data, dict) or not data:
+        raise IncorrectlyFormattedInputData("Expected a non-empty object.")
+
+    if input_format == Input.ABBYY:
+        return validate_abbyy(data)
+    if input_format == Input.TESSERACT:
+        return validate_tesseract(data, **kwargs)
+    if input_format == Input.TRANSKRIBUS:
+        return validate_transkribus_data(data)
+
+    raise NoSuchConverter()
+
+
+def validate_item(
+    index: int, item: dict, input_format: str = Input.TESSERACT, **kwargs
+) -> list:
+    """
+    Given a manifest item (see shard.iter_manifest) and its index, returns a
+    list of [index, field, error] failures (empty if the item is valid).
+    """
+
+    failures = []
+
+    if not isinstance(item, dict):
+        return [[index, "item", "Expected an object."]]
+
+    for field in ["image", "input_data"]:
+        if item.get(field) is None:
+            failures.append([index, field, "Missing."])
+            continue
+
+        try:
+            if field == "image":
+                if not isinstance(item[field], str):
+                    raise TypeError("Expected a path or URL.")
+                validate_image(item[field])
+            else:
+                validate_input_data(item[field], input_format, **kwargs)
+        except Exception as e:
+            failures.append([index, field, f"{e!r}"])
+
+    return failures
+
+
+def validate_manifest(
+    manifest: Union[str, Path],
+    input_format: str = Input.TESSERACT,
+    workers: int = 8,
+    **kwargs,
+) -> dict:
+    """
+    Given a manifest (see shard.iter_manifest), checks every item's image and
+    input data in parallel, before any conversion is run, and returns a
+    summary with the number of items checked and all failures found.
+    """
+
+    items, failures = 0, []
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = []
+        for index, item in iter_manifest(manifest):
+            items += 1
+            pending.append(
+                executor.submit(
+                    validate_item, index, item, input_format, **kwargs
+                )
+            )
+
+            # Keep the number of items held in memory bounded
+            if len(pending) >= workers * 4:
+                failures.extend(pending.pop(0).result())
+
+        for future in pending:
+            failures.extend(future.result())
+
+    return {"items": items, "failures": failures}
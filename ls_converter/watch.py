@@ -0,0 +1,404 @@
+from . import LabelStudioConverter
+from .meta import Input, Output
+from .utils import pair_files
+
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Union
+
+import json
+import os
+import queue
+import threading
+import time
+
+
+class Watcher:
+    """
+    Long-running converter for directories that image/OCR pairs are dropped
+    into. Pairs are picked up once both files are present and have not
+    changed for `settle` seconds, pushed through a bounded queue into a pool
+    of worker threads, and each converted task is appended as one line to a
+    rolling JSONL output (tasks-00001.jsonl, tasks-00002.jsonl, ... with at
+    most max_lines tasks each).
+
+    The directories are watched with inotify (through the optional watchdog
+    package) if available, in which case only the files changed since the
+    last scan are looked at again, and are polled every `interval` seconds
+    otherwise. Converted images are recorded in processed.txt in the output
+    directory, so they are not converted again after a restart, and a
+    status.json file with progress counts is kept up to date. Pairs that
+    fail are retried once either of their files changes.
+    """
+
+    def __init__(
+        self,
+        input_dirs: list,
+        output_dir: Union[str, Path],
+        input_format: str = Input.TESSERACT,
+        url_prefix: Union[str, None] = None,
+        workers: int = 4,
+        queue_size: int = 100,
+        settle: float = 5.0,
+        interval: float = 2.0,
+        max_lines: int = 10000,
+        **kwargs,
+    ):
+        self.input_dirs = [Path(x) for x in input_dirs]
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        self.converter = LabelStudioConverter(input_format=input_format)
+        self.url_prefix = url_prefix
+        self.workers = workers
+        self.settle = settle
+        self.interval = interval
+        self.max_lines = max_lines
+        self.kwargs = kwargs
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stopping = threading.Event()
+        self.changed = threading.Event()
+        self.lock = threading.Lock()
+
+        # Last seen (size, mtime) per file not yet converted, and when it
+        # last changed
+        self.seen = {}
+
+        # Paths changed since the last scan, as reported by watchdog (if
+        # observed), which then only need to be looked at again
+        self.events = set()
+        self.observed, self.scanned = False, False
+
+        # Image paths queued or in progress, and converted (with the paths of
+        # both files of converted pairs, which are no longer looked at)
+        self.queued = set()
+        self.processed_path = self.output_dir / "processed.txt"
+        self.done = (
+            set(self.processed_path.read_text().splitlines())
+            if self.processed_path.exists()
+            else set()
+        )
+        self.done_files = set(self.done)
+
+        # Signatures of each queued pair's files, and of each failed pair's
+        # files, so that failed pairs are retried once either file changes
+        self.signatures, self.failed = {}, {}
+
+        self.counts = {"converted": 0, "failed": 0}
+        self.last_error = None
+        self.started = datetime.now(timezone.utc).isoformat()
+        self.status_path = self.output_dir / "status.json"
+
+        self.output, self.output_lines, self.output_num = None, 0, 0
+        self.next_check = interval
+
+    def get_url(self, image: str) -> str:
+        if self.url_prefix is None:
+            return image
+
+        for input_dir in self.input_dirs:
+            if Path(image).is_relative_to(input_dir):
+                return (
+                    self.url_prefix
+                    + Path(image).relative_to(input_dir).as_posix()
+                )
+
+        return self.url_prefix + Path(image).name
+
+    def get_paths(self) -> list:
+        """
+        Returns the paths to look at again: all files in the input
+        directories on the first scan or when polling, and only the paths
+        changed since the last scan when watched with watchdog.
+        """
+
+        if self.observed and self.scanned:
+            with self.lock:
+                paths, self.events = self.events, set()
+
+            return list(paths)
+
+        paths = [
+            os.path.join(root, name)
+            for input_dir in self.input_dirs
+            for root, _, files in os.walk(input_dir)
+            for name in files
+        ]
+
+        # Forget files that have gone
+        current = set(paths)
+        for path in [x for x in self.seen if x not in current]:
+            del self.seen[path]
+
+        self.scanned = True
+
+        return paths
+
+    def update(self, paths: list, now: float) -> None:
+        """
+        Given paths to look at again, updates their last seen (size, mtime)
+        and when it last changed, walking any directories among them.
+        """
+
+        for path in paths:
+            if path in self.done_files:
+                continue
+
+            if os.path.isdir(path):
+                self.update(
+                    [
+                        os.path.join(root, name)
+                        for root, _, files in os.walk(path)
+                        for name in files
+                    ],
+                    now,
+                )
+                continue
+
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                # Removed, along with anything inside it if a directory
+                prefix = path + os.sep
+                for removed in [
+                    x for x in self.seen if x == path or x.startswith(prefix)
+                ]:
+                    del self.seen[removed]
+                continue
+
+            signature = (stat.st_size, stat.st_mtime)
+            previous = self.seen.get(path)
+            if not previous or previous[0] != signature:
+                self.seen[path] = (signature, now)
+
+    def scan(self) -> list:
+        """
+        Looks at new and changed files in the input directories (see
+        get_paths) and returns the (image, data) pairs that are ready to
+        convert: not converted before, not failed with the same files, and
+        with both files unchanged for at least `settle` seconds.
+        """
+
+        now = time.monotonic()
+        self.update(self.get_paths(), now)
+
+        ready, self.next_check = [], self.interval
+        for image, data in pair_files(list(self.seen.keys())):
+            if image in self.done:
+                # Converted before a restart: stop looking at its files
+                self.done_files.update([image, data])
+                self.seen.pop(image, None)
+                self.seen.pop(data, None)
+                continue
+
+            if image in self.queued:
+                continue
+
+            signatures = (self.seen[image][0], self.seen[data][0])
+            with self.lock:
+                if self.failed.get(image) == signatures:
+                    continue
+
+            unchanged = now - max(self.seen[image][1], self.seen[data][1])
+            if unchanged >= self.settle:
+                ready.append((image, data))
+                with self.lock:
+                    self.signatures[image] = signatures
+            else:
+                # Come back as soon as the pair will have settled
+                self.next_check = min(self.next_check, self.settle - unchanged)
+
+        return ready
+
+    def enqueue(self, pairs: list) -> None:
+        """
+        Adds the pairs to the work queue, blocking while it is full (so that
+        scanning cannot outpace conversion) until stop is called.
+        """
+
+        for pair in pairs:
+            # Added before the put, as a worker may finish it straight away
+            with self.lock:
+                self.queued.add(pair[0])
+
+            while not self.stopping.is_set():
+                try:
+                    self.queue.put(pair, timeout=0.5)
+                except queue.Full:
+                    self.write_status()
+                    continue
+
+                break
+            else:
+                # Stopping before the pair could be queued
+                with self.lock:
+                    self.queued.discard(pair[0])
+
+    def work(self) -> None:
+        """
+        Worker loop: converts pairs from the queue until it gets None.
+        """
+
+        while True:
+            pair = self.queue.get()
+            if pair is None:
+                return
+
+            image, data = pair
+            try:
+                task = self.converter.convert(
+                    image=image,
+                    input_data=data,
+                    url=self.get_url(image),
+                    output=Output.BYTES,
+                    **self.kwargs,
+                )
+            except Exception as e:
+                # Not recorded in processed.txt, so retried after a restart,
+                # or as soon as either file changes
+                with self.lock:
+                    self.counts["failed"] += 1
+                    self.last_error = f"{image}: {e!r}"
+                    self.failed[image] = self.signatures.get(image)
+            else:
+                with self.lock:
+                    # Pages split into several tasks come as a list
+                    for part in task if isinstance(task, list) else [task]:
+                        self.write_task(part)
+                    self.counts["converted"] += 1
+                    self.failed.pop(image, None)
+                    self.mark_done(image, data)
+            finally:
+                with self.lock:
+                    self.signatures.pop(image, None)
+                    self.queued.discard(image)
+
+    def mark_done(self, image: str, data: str) -> None:
+        self.done.add(image)
+        self.done_files.update([image, data])
+        with open(self.processed_path, "a", encoding="utf-8") as f:
+            f.write(image + "\n")
+
+    def write_task(self, task: bytes) -> None:
+        """
+        Appends a serialised task to the current JSONL output, rolling over
+        to a new file after max_lines tasks.
+        """
+
+        if self.output is None or self.output_lines >= self.max_lines:
+            if self.output is not None:
+                self.output.close()
+
+            # Continue after any outputs from earlier runs
+            while True:
+                self.output_num += 1
+                path = self.output_dir / f"tasks-{self.output_num:05d}.jsonl"
+                if not path.exists():
+                    break
+
+            self.output, self.output_lines = open(path, "ab"), 0
+
+        self.output.write(task + b"\n")
+        self.output.flush()
+        self.output_lines += 1
+
+    def write_status(self, state: str = "running") -> None:
+        """
+        Writes the current progress to status.json (atomically, so readers
+        never see a partially written file).
+        """
+
+        status = {
+            "state": state,
+            "started": self.started,
+            "updated": datetime.now(timezone.utc).isoformat(),
+            "queued": self.queue.qsize(),
+            "in_progress": max(len(self.queued) - self.queue.qsize(), 0),
+            "converted": self.counts["converted"],
+            "failed": self.counts["failed"],
+            "last_error": self.last_error,
+            "output": self.output.name if self.output else None,
+        }
+
+        temporary = self.status_path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(status, indent=2))
+        os.replace(temporary, self.status_path)
+
+    def get_observer(self):
+        """
+        Returns a started watchdog observer that records the paths of all
+        file system events (see get_paths) and wakes the scanner up, or None
+        if watchdog is not installed.
+        """
+
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            return None
+
+        watcher = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                with watcher.lock:
+                    watcher.events.add(os.fsdecode(event.src_path))
+                    if getattr(event, "dest_path", None):
+                        watcher.events.add(os.fsdecode(event.dest_path))
+                watcher.changed.set()
+
+        observer = Observer()
+        for input_dir in self.input_dirs:
+            observer.schedule(Handler(), str(input_dir), recursive=True)
+        observer.start()
+
+        return observer
+
+    def run(self) -> None:
+        """
+        Runs until stop is called, then finishes converting everything that
+        was already queued before returning.
+        """
+
+        threads = [
+            threading.Thread(target=self.work, daemon=True)
+            for _ in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        observer = self.get_observer()
+        self.observed = observer is not None
+
+        try:
+            while not self.stopping.is_set():
+                self.changed.clear()
+                self.enqueue(self.scan())
+                self.write_status()
+
+                # Wait for a file system event or the next poll, whichever
+                # comes first
+                self.changed.wait(self.next_check)
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+
+            self.write_status("stopping")
+            for _ in threads:
+                self.queue.put(None)
+            for thread in threads:
+                thread.join()
+
+            if self.output is not None:
+                self.output.close()
+            self.write_status("stopped")
+
+    def stop(self, *_) -> None:
+        """
+        Asks the watcher to stop (can be used as a signal handler).
+        """
+
+        self.stopping.set()
+        self.changed.set()
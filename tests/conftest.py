@@ -0,0 +1,44 @@
+import copy
+import pytest
+
+# A single word on a 200x100 page
+TESSERACT_DATA = {
+    "level": [1, 2, 5],
+    "page_num": [1, 1, 1],
+    "block_num": [0, 1, 1],
+    "par_num": [0, 0, 1],
+    "line_num": [0, 0, 1],
+    "word_num": [0, 0, 1],
+    "left": [0, 10, 10],
+    "top": [0, 20, 20],
+    "width": [200, 50, 50],
+    "height": [100, 10, 10],
+    "conf": ["-1", "-1", 90],
+    "text": ["", "", "One"],
+}
+
+# A word on each of two pages, of 100x100 and 200x400
+TESSERACT_PAGES = {
+    "level": [1, 2, 5, 1, 2, 5],
+    "page_num": [1, 1, 1, 2, 2, 2],
+    "block_num": [0, 1, 1, 0, 1, 1],
+    "par_num": [0, 0, 1, 0, 0, 1],
+    "line_num": [0, 0, 1, 0, 0, 1],
+    "word_num": [0, 0, 1, 0, 0, 1],
+    "left": [0, 10, 10, 0, 50, 50],
+    "top": [0, 20, 20, 0, 50, 50],
+    "width": [100, 50, 50, 200, 100, 100],
+    "height": [100, 10, 10, 400, 40, 40],
+    "conf": ["-1", "-1", 90, "-1", "-1", 80],
+    "text": ["", "", "One", "", "", "Two"],
+}
+
+
+@pytest.fixture
+def tesseract_data():
+    return copy.deepcopy(TESSERACT_DATA)
+
+
+@pytest.fixture
+def tesseract_pages():
+    return copy.deepcopy(TESSERACT_PAGES)
@@ -0,0 +1,166 @@
+from PIL import Image
+
+import json
+import pytest
+import random
+import time
+
+from ls_converter import (
+    AgreementConverter,
+    Input,
+    NotSupportedByAgreement,
+    Output,
+)
+from ls_converter.agreement import (
+    get_agreement,
+    get_agreement_scores,
+    get_cer,
+    get_distance,
+    match_regions,
+)
+from ls_converter.utils import Region
+
+
+def get_data(texts):
+    return {
+        "level": [2 for _ in texts],
+        "page_num": [1 for _ in texts],
+        "block_num": list(range(1, len(texts) + 1)),
+        "left": [0 for _ in texts],
+        "top": [i * 20 for i in range(len(texts))],
+        "width": [100 for _ in texts],
+        "height": [10 for _ in texts],
+        "conf": [90 for _ in texts],
+        "text": texts,
+    }
+
+
+def test_get_cer():
+    assert get_cer("", "") == 0
+    assert get_cer("kitten", "kitten") == 0
+    assert get_cer("kitten", "sitting") == 3 / 7
+    assert get_cer("abc", "") == 1
+
+
+def get_distance_table(a, b):
+    # Reference implementation, filling in the whole edit distance table
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (char_a != char_b),
+                )
+            )
+        previous = current
+
+    return previous[-1]
+
+
+def test_get_distance():
+    generator = random.Random(0)
+    for _ in range(500):
+        a, b = [
+            "".join(
+                generator.choice("abc ")
+                for _ in range(generator.randint(0, 70))
+            )
+            for _ in range(2)
+        ]
+        assert get_distance(a, b) == get_distance_table(a, b)
+
+
+def test_get_agreement_scores_block_sized_texts():
+    # Three engines with 30 blocks of about 1,500 characters each, as in
+    # block-level ABBYY or Transkribus output
+    generator = random.Random(0)
+    texts = [
+        "".join(generator.choice("abcdefghij \n") for _ in range(1500))
+        for _ in range(30)
+    ]
+
+    engines = []
+    for _ in range(3):
+        engine = []
+        for i, text in enumerate(texts):
+            text = list(text)
+            for _ in range(100):
+                text[generator.randrange(len(text))] = generator.choice("xyz")
+            engine.append(Region(str(i), 0, i * 20, 100, 10, "".join(text), 1))
+        engines.append(engine)
+
+    start = time.perf_counter()
+    scores = get_agreement_scores(engines)
+    assert time.perf_counter() - start < 5
+
+    assert all(0.8 < x < 0.95 for x in scores)
+
+
+def test_match_regions():
+    a = [Region("a0", 0, 0, 10, 10, "", 0), Region("a1", 50, 0, 10, 10, "", 0)]
+    b = [Region("b0", 51, 0, 10, 10, "", 0), Region("b1", 1, 0, 10, 10, "", 0)]
+
+    assert match_regions(a, b) == [(0, 1), (1, 0)]
+    assert match_regions(a, b, iou_threshold=0.95) == []
+
+
+def test_get_agreement():
+    a = [Region("a", 0, 0, 10, 10, "word", 0)]
+    b = [Region("b", 0, 0, 10, 10, "ward", 0), Region("c", 50, 0, 9, 9, "", 0)]
+
+    assert get_agreement(a, a) == 1
+    assert get_agreement(a, b) == 0.75 / 2
+    assert get_agreement([], []) == 1
+    assert get_agreement_scores([a, a, b]) == [
+        (1 + 0.375) / 2,
+        (1 + 0.375) / 2,
+        0.375,
+    ]
+
+
+def test_agreement_converter():
+    converter = AgreementConverter([Input.TESSERACT, Input.TESSERACT])
+
+    task = converter.convert(
+        Image.new("RGB", (100, 100)),
+        [get_data(["same", "text"]), get_data(["same", "test"])],
+        url="a.jpg",
+    )
+
+    assert task["data"]["ocr"] == "a.jpg"
+    assert [x["model_version"] for x in task["predictions"]] == [
+        Input.TESSERACT,
+        Input.TESSERACT,
+    ]
+    assert [x["score"] for x in task["predictions"]] == [0.875, 0.875]
+    assert len(task["predictions"][0]["result"]) == 4
+
+    with pytest.raises(SyntaxError):
+        converter.convert(Image.new("RGB", (100, 100)), [get_data(["a"])])
+
+
+def test_agreement_converter_output_and_unsupported():
+    converter = AgreementConverter([Input.TESSERACT, Input.TESSERACT])
+    image = Image.new("RGB", (100, 100))
+    input_data = [get_data(["same", "text"]), get_data(["same", "test"])]
+
+    task = converter.convert(image, input_data, url="a.jpg")
+    as_bytes = converter.convert(
+        image, input_data, url="a.jpg", output=Output.BYTES
+    )
+    assert json.loads(as_bytes)["predictions"][0]["score"] == 0.875
+    assert len(json.loads(as_bytes)["predictions"]) == len(task["predictions"])
+
+    for key in ["max_regions", "max_bytes"]:
+        with pytest.raises(NotSupportedByAgreement, match=key):
+            converter.convert(image, input_data, url="a.jpg", **{key: 1})
+
+    with pytest.raises(NotSupportedByAgreement):
+        converter.convert_pages(image, input_data)
+    with pytest.raises(NotSupportedByAgreement):
+        converter.convert_archive("export.zip")
+    with pytest.raises(NotSupportedByAgreement):
+        converter.set_converter()
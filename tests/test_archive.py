@@ -0,0 +1,108 @@
+from io import BytesIO
+from PIL import Image
+
+import json
+import tarfile
+import zipfile
+
+from ls_converter import Archive, LabelStudioConverter, Input
+from ls_converter.utils import pair_files
+
+
+def image_bytes(size=(200, 100)):
+    b = BytesIO()
+    Image.new("RGB", size).save(b, format="PNG")
+    return b.getvalue()
+
+
+def test_pair_files():
+    names = [
+        "doc/0001.jpg",
+        "doc/0002.jpg",
+        "doc/alto/0001.xml",
+        "doc/0002.json",
+        "doc/0003.jpg",
+        "doc/notes.txt",
+    ]
+
+    assert pair_files(names) == [
+        ("doc/0001.jpg", "doc/alto/0001.xml"),
+        ("doc/0002.jpg", "doc/0002.json"),
+    ]
+
+
+def test_convert_zip_archive(tmp_path, tesseract_data):
+    path = tmp_path / "export.zip"
+    with zipfile.ZipFile(path, "w") as z:
+        z.writestr("export/page.png", image_bytes())
+        z.writestr("export/page.json", json.dumps(tesseract_data))
+
+    converter = LabelStudioConverter(input_format=Input.TESSERACT)
+    tasks = list(
+        converter.convert_archive(path, url_prefix="https://example.org/")
+    )
+
+    assert len(tasks) == 1
+    assert tasks[0]["data"]["ocr"] == "https://example.org/export/page.png"
+
+    result = tasks[0]["predictions"][0]["result"]
+    assert result[0]["value"]["x"] == 5
+    assert result[1]["value"]["text"] == ["One"]
+
+
+def test_convert_tar_archive(tmp_path, tesseract_data):
+    path = tmp_path / "export.tar.gz"
+    with tarfile.open(path, "w:gz") as t:
+        for name, contents in [
+            ("page.png", image_bytes()),
+            ("page.json", json.dumps(tesseract_data).encode()),
+        ]:
+            info = tarfile.TarInfo(name)
+            info.size = len(contents)
+            t.addfile(info, BytesIO(contents))
+
+    with Archive(path) as archive:
+        assert archive.pairs() == [("page.png", "page.json")]
+        assert archive.open_image("page.png").size == (200, 100)
+
+
+def test_convert_tar_archive_single_pass(tmp_path, tesseract_data):
+    # Images before their data (as in Transkribus exports), and data before
+    # its image
+    path = tmp_path / "export.tar.gz"
+    with tarfile.open(path, "w:gz") as t:
+        for name, contents in [
+            ("doc/0001.png", image_bytes()),
+            ("doc/0002.png", image_bytes((400, 200))),
+            ("doc/data/0001.json", json.dumps(tesseract_data).encode()),
+            ("doc/data/0002.json", json.dumps(tesseract_data).encode()),
+            ("doc/data/0003.json", json.dumps(tesseract_data).encode()),
+            ("doc/0003.png", image_bytes()),
+        ]:
+            info = tarfile.TarInfo(name)
+            info.size = len(contents)
+            t.addfile(info, BytesIO(contents))
+
+    converter = LabelStudioConverter(input_format=Input.TESSERACT)
+    with Archive(path) as archive:
+        offsets, extractfile = [], archive._tar.extractfile
+
+        def record(member):
+            offsets.append(member.offset)
+            return extractfile(member)
+
+        archive._tar.extractfile = record
+
+        tasks = list(converter.convert_archive(archive, url_prefix=""))
+
+    # Archive order: the image reached after its data comes first
+    assert [x["data"]["ocr"] for x in tasks] == [
+        "doc/0003.png",
+        "doc/0001.png",
+        "doc/0002.png",
+    ]
+    assert tasks[2]["predictions"][0]["result"][0]["value"]["x"] == 2.5
+
+    # Every member is read once, going back to the start at most once
+    assert len(offsets) == 6
+    assert sum(b < a for a, b in zip(offsets, offsets[1:])) <= 1
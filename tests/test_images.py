@@ -0,0 +1,151 @@
+from PIL import Image
+
+import os
+import pytest
+import threading
+import tracemalloc
+
+from ls_converter import (
+    IncorrectImageFormat,
+    ImagePool,
+    ImageSource,
+    IMAGE_POOL,
+    Input,
+    LabelStudioConverter,
+    Output,
+)
+
+
+@pytest.fixture
+def image(tmp_path):
+    path = tmp_path / "page.png"
+    Image.new("RGB", (200, 100)).save(path)
+    return str(path)
+
+
+def count_fds():
+    return len(os.listdir("/proc/self/fd"))
+
+
+def test_image_source(image):
+    source = ImageSource(image)
+    assert source.image is None and source.filename == image
+
+    with source:
+        assert source.size == (200, 100)
+        assert IMAGE_POOL.open == 1
+
+        # Nested contexts keep the image open
+        with source:
+            pass
+        assert source.image is not None
+
+    # Closed, but the size and filename are kept
+    assert source.image is None and IMAGE_POOL.open == 0
+    assert source.size == (200, 100) and source.filename == image
+
+
+def test_image_source_bytes(image):
+    with open(image, "rb") as f:
+        source = ImageSource(f.read())
+
+    with source:
+        assert source.size == (200, 100)
+
+    assert source.image is None and IMAGE_POOL.open == 0
+
+
+def test_image_source_leaves_pil_images_open(image):
+    pil_image = Image.open(image)
+
+    with ImageSource(pil_image) as source:
+        assert source.image is pil_image
+
+    # Belongs to the caller, so it is still usable
+    assert pil_image.load() is not None and IMAGE_POOL.open == 0
+
+
+def test_image_source_restores_pil_frame(tmp_path):
+    path = tmp_path / "reel.tif"
+    Image.new("RGB", (100, 100)).save(
+        path, save_all=True, append_images=[Image.new("RGB", (200, 400))]
+    )
+    pil_image = Image.open(path)
+
+    with ImageSource(pil_image) as source:
+        source.seek(1)
+        assert source.size == (200, 400)
+
+    # Seeking the caller's image is undone when the context is left
+    assert pil_image.tell() == 0 and pil_image.size == (100, 100)
+
+
+def test_image_source_incorrect(tmp_path):
+    path = tmp_path / "page.png"
+    path.write_text("Not an image")
+
+    with pytest.raises(IncorrectImageFormat):
+        with ImageSource(str(path)):
+            pass
+
+    with pytest.raises(IncorrectImageFormat):
+        with ImageSource(None):
+            pass
+
+    assert IMAGE_POOL.open == 0
+
+
+def test_image_pool(image):
+    pool, opened = ImagePool(size=1), threading.Event()
+
+    def open_second():
+        with ImageSource(image, pool=pool):
+            opened.set()
+
+    with ImageSource(image, pool=pool):
+        thread = threading.Thread(target=open_second)
+        thread.start()
+
+        # Blocks while the first image is open
+        assert not opened.wait(0.1)
+
+    assert opened.wait(1)
+    thread.join()
+    assert pool.open == 0
+
+
+def test_convert_closes_image(image, tesseract_data):
+    converter = LabelStudioConverter(input_format=Input.TESSERACT)
+
+    task = converter.convert(image, tesseract_data, url="page")
+
+    assert task["predictions"][0]["result"][0]["value"]["x"] == 5
+    assert IMAGE_POOL.open == 0
+
+
+def test_soak(image, tesseract_data):
+    converter = LabelStudioConverter(input_format=Input.TESSERACT)
+
+    def convert(n):
+        for _ in range(n):
+            converter.convert(
+                image, tesseract_data, url="page", output=Output.BYTES
+            )
+
+    # Warm up, so that caches and lazily imported plugins are in place
+    convert(100)
+
+    fds = count_fds()
+    tracemalloc.start()
+    try:
+        convert(500)
+        first, _ = tracemalloc.get_traced_memory()
+        convert(2000)
+        second, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # Neither file descriptors nor memory grow with the number converted
+    assert count_fds() == fds
+    assert second - first < 64 * 1024
+    assert IMAGE_POOL.open == 0
@@ -0,0 +1,54 @@
+from PIL import Image
+
+import json
+import pytest
+
+from ls_converter import (
+    LabelStudioConverter,
+    Input,
+    MultipageTesseract,
+    Output,
+    PageNumIncorrect,
+)
+
+
+@pytest.fixture
+def tiff(tmp_path):
+    path = tmp_path / "reel.tif"
+    frames = [Image.new("RGB", (100, 100)), Image.new("RGB", (200, 400))]
+    frames[0].save(path, save_all=True, append_images=frames[1:])
+    return str(path)
+
+
+def test_convert_pages(tiff, tesseract_pages):
+    converter = LabelStudioConverter(input_format=Input.TESSERACT)
+
+    tasks = list(converter.convert_pages(tiff, tesseract_pages, url="reel"))
+
+    assert [x["data"] for x in tasks] == [
+        {"ocr": "reel", "page": 1},
+        {"ocr": "reel", "page": 2},
+    ]
+
+    # Coordinates are relative to each frame's own size
+    first, second = [x["predictions"][0]["result"] for x in tasks]
+    assert first[0]["value"]["x"] == 10 and first[0]["value"]["width"] == 50
+    assert second[0]["value"]["x"] == 25 and second[0]["value"]["y"] == 12.5
+    assert first[1]["value"]["text"] == ["One"]
+    assert second[1]["value"]["text"] == ["Two"]
+
+    # Bytes output carries the page number, too
+    tasks = converter.convert_pages(
+        tiff, tesseract_pages, url="reel", output=Output.BYTES
+    )
+    assert [json.loads(x)["data"]["page"] for x in tasks] == [1, 2]
+
+
+def test_multipage_warning_and_missing_page(tiff, tesseract_pages):
+    converter = LabelStudioConverter(input_format=Input.TESSERACT)
+
+    with pytest.warns(MultipageTesseract):
+        converter.convert(tiff, tesseract_pages, url="reel")
+
+    with pytest.raises(PageNumIncorrect):
+        converter.convert(tiff, tesseract_pages, url="reel", page_num=3)
@@ -0,0 +1,100 @@
+from PIL import Image
+
+import pytest
+
+from ls_converter import IoUThresholdIncorrect, LabelStudioConverter, Input
+from ls_converter.regions import (
+    GridIndex,
+    get_iou,
+    merge_regions,
+    sort_regions,
+)
+from ls_converter.utils import Region
+
+
+def test_get_iou():
+    a = Region("a", 0, 0, 10, 10, "", 0)
+    b = Region("b", 5, 0, 10, 10, "", 0)
+    c = Region("c", 20, 20, 10, 10, "", 0)
+
+    assert get_iou(a, a) == 1
+    assert get_iou(a, b) == 50 / 150
+    assert get_iou(a, c) == 0
+
+
+def test_grid_index_query():
+    regions = [Region(str(i), i * 100, 0, 10, 10, "", 0) for i in range(50)]
+    index = GridIndex(regions)
+
+    assert index.query(Region("q", 1005, 5, 10, 10, "", 0)) == {10}
+
+
+def test_merge_regions():
+    regions = [
+        Region("a", 0, 0, 100, 20, "Hello world", 0.9),
+        Region("b", 2, 1, 100, 20, "Hello world", 0.5),  # duplicate of a
+        Region("c", 10, 5, 30, 10, "Hello", 0.8),  # nested in a
+        Region("d", 0, 100, 100, 20, "Top", 0.4),
+        Region("e", 0, 105, 100, 20, "Bottom", 0.6),  # overlaps d
+        Region("f", 500, 500, 10, 10, "Alone", 0.1),
+    ]
+
+    assert merge_regions(regions, iou_threshold=0.5) == [
+        Region("a", 0, 0, 100, 20, "Hello world", 0.9),
+        Region("d", 0, 100, 100, 25, "Top\nBottom", 0.5),
+        Region("f", 500, 500, 10, 10, "Alone", 0.1),
+    ]
+
+
+def test_sort_regions_into_columns():
+    # A heading across the page, then two columns of two lines each
+    heading = Region("heading", 0, 0, 200, 20, "", 0)
+    left = [Region(f"l{i}", 0, 40 + i * 15, 90, 10, "", 0) for i in range(2)]
+    right = [
+        Region(f"r{i}", 110, 40 + i * 15, 90, 10, "", 0) for i in range(2)
+    ]
+
+    regions = [right[1], left[1], heading, right[0], left[0]]
+
+    assert [x.id for x in sort_regions(regions)] == [
+        "heading",
+        "l0",
+        "l1",
+        "r0",
+        "r1",
+    ]
+
+
+def test_convert_with_postprocessing():
+    data = {
+        "level": [2, 2, 2],
+        "page_num": [1, 1, 1],
+        "block_num": [1, 2, 3],
+        "left": [0, 0, 1],
+        "top": [50, 0, 51],
+        "width": [100, 100, 100],
+        "height": [10, 10, 10],
+        "conf": [90, 80, 70],
+        "text": ["second", "first", "second"],
+    }
+    converter = LabelStudioConverter(input_format=Input.TESSERACT)
+
+    task = converter.convert(
+        Image.new("RGB", (100, 100)),
+        data,
+        url="a.jpg",
+        merge_iou=0.5,
+        reading_order=True,
+    )
+
+    texts = [
+        x["value"]["text"]
+        for x in task["predictions"][0]["result"]
+        if x["type"] == "textarea"
+    ]
+    assert texts == [["first"], ["second"]]
+
+    with pytest.raises(IoUThresholdIncorrect):
+        converter.convert(
+            Image.new("RGB", (100, 100)), data, url="a.jpg", merge_iou=2
+        )
@@ -0,0 +1,280 @@
+from PIL import Image
+
+import json
+import xmltodict
+
+from ls_converter import (
+    Input,
+    LabelStudioConverter,
+    TesseractConverter,
+    TranskribusConverter,
+)
+from ls_converter.reverse import (
+    convert_export,
+    get_export_name,
+    get_export_regions,
+    iter_export,
+    regions_to_alto,
+)
+from ls_converter.utils import Region
+
+TRANSKRIBUS_DATA = {
+    "alto": {
+        "Layout": {
+            "Page": {
+                "PrintSpace": {
+                    "TextBlock": [
+                        {
+                            "@HPOS": "12",
+                            "@VPOS": "34",
+                            "@WIDTH": "56",
+                            "@HEIGHT": "78",
+                            "TextLine": [
+                                {"String": {"@CONTENT": "First"}},
+                                {"String": {"@CONTENT": "Second"}},
+                            ],
+                        },
+                        {
+                            "@HPOS": "100",
+                            "@VPOS": "200",
+                            "@WIDTH": "33",
+                            "@HEIGHT": "20",
+                            "TextLine": [
+                                {"String": {"@CONTENT": "Third line"}},
+                                {"String": {"@CONTENT": "Fourth"}},
+                            ],
+                        },
+                    ]
+                }
+            }
+        }
+    }
+}
+
+IMAGE_SIZE = (301, 401)
+
+
+def image_size(url):
+    return IMAGE_SIZE
+
+
+def get_tasks():
+    image = Image.new("RGB", IMAGE_SIZE)
+    return [
+        TranskribusConverter.convert(
+            TRANSKRIBUS_DATA, image, f"https://example.org/page-{i}.jpg"
+        )
+        for i in range(3)
+    ]
+
+
+def test_iter_export_streams_json_and_jsonl(tmp_path):
+    tasks = get_tasks()
+
+    as_json = tmp_path / "export.json"
+    as_json.write_text(json.dumps(tasks, indent=2))
+    assert list(iter_export(as_json, chunk_size=7)) == tasks
+
+    as_jsonl = tmp_path / "export.jsonl"
+    as_jsonl.write_text("\n".join(json.dumps(x) for x in tasks))
+    assert list(iter_export(as_jsonl, chunk_size=7)) == tasks
+
+
+def test_annotations_take_precedence_over_predictions():
+    task = get_tasks()[0]
+    task["annotations"] = [
+        {
+            "result": [
+                {
+                    "id": "a",
+                    "type": "textarea",
+                    "value": {
+                        "x": 50,
+                        "y": 50,
+                        "width": 10,
+                        "height": 10,
+                        "text": ["Corrected"],
+                    },
+                    "original_width": 200,
+                    "original_height": 100,
+                }
+            ]
+        }
+    ]
+
+    regions, width, height = get_export_regions(task)
+
+    assert (width, height) == (200, 100)
+    assert [(x.x, x.y, x.width, x.height, x.text) for x in regions] == [
+        (100, 50, 20, 10, "Corrected")
+    ]
+
+
+def test_round_trip_to_alto_and_tsv(tmp_path):
+    export = tmp_path / "export.json"
+    export.write_text(json.dumps(get_tasks()))
+
+    original = [
+        (x.x, x.y, x.width, x.height, x.text)
+        for x in TranskribusConverter.get_regions(TRANSKRIBUS_DATA, None)
+    ]
+
+    written = convert_export(
+        export, tmp_path / "alto", Input.TRANSKRIBUS, image_size
+    )
+    assert [x.name for x in written] == [
+        "page-0.xml",
+        "page-1.xml",
+        "page-2.xml",
+    ]
+
+    alto = xmltodict.parse(written[0].read_text())
+    assert alto["alto"]["Layout"]["Page"]["@WIDTH"] == "301"
+    assert [
+        (x.x, x.y, x.width, x.height, x.text)
+        for x in TranskribusConverter.get_regions(alto, None)
+    ] == original
+
+    written = convert_export(
+        export, tmp_path / "tsv", Input.TESSERACT, image_size
+    )
+    rows = [x.split("\t") for x in written[0].read_text().splitlines()]
+    data = {key: [] for key in rows[0]}
+    for row in rows[1:]:
+        for key, value in zip(rows[0], row):
+            if key == "text" or value == "-1":
+                data[key].append(value)
+            else:
+                data[key].append(float(value) if "." in value else int(value))
+
+    regions = TesseractConverter.get_regions(data, None)
+    assert [(x.x, x.y, x.width, x.height) for x in regions] == [
+        x[:4] for x in original
+    ]
+    assert [x.text for x in regions] == ["First Second", "Third line Fourth"]
+
+
+def test_get_export_name():
+    assert get_export_name("https://example.org/scans/p1.jpg?x=1") == "p1"
+    assert get_export_name("/data/local-files/?d=scans/p1.jpg") == "p1"
+    assert get_export_name("/data/local-files/?d=scans%2Fp%202.jpg") == "p 2"
+    assert get_export_name("") == ""
+
+
+def test_convert_export_local_files(tmp_path):
+    image = Image.new("RGB", IMAGE_SIZE)
+    tasks = [
+        TranskribusConverter.convert(
+            TRANSKRIBUS_DATA, image, f"/data/local-files/?d=scans/p{i}.jpg"
+        )
+        for i in range(2)
+    ]
+
+    export = tmp_path / "export.json"
+    export.write_text(json.dumps(tasks))
+
+    written = convert_export(
+        export, tmp_path / "tsv", Input.TESSERACT, image_size
+    )
+    assert [x.name for x in written] == ["p0.tsv", "p1.tsv"]
+
+
+def test_convert_export_pages(tmp_path):
+    image = Image.new("RGB", IMAGE_SIZE)
+    tasks = [
+        TranskribusConverter.build_task(
+            TranskribusConverter.get_regions(TRANSKRIBUS_DATA, image),
+            image,
+            "https://example.org/reel.tif",
+            data={"page": page},
+        )
+        for page in [1, 2]
+    ]
+
+    export = tmp_path / "export.json"
+    export.write_text(json.dumps(tasks))
+
+    written = convert_export(
+        export, tmp_path / "alto", Input.TRANSKRIBUS, image_size
+    )
+    assert [x.name for x in written] == ["reel-page-1.xml", "reel-page-2.xml"]
+
+    page = xmltodict.parse(written[1].read_text())["alto"]["Layout"]["Page"]
+    assert page["@ID"] == "page_2" and page["@PHYSICAL_IMG_NR"] == "2"
+
+    written = convert_export(
+        export, tmp_path / "tsv", Input.TESSERACT, image_size
+    )
+    assert [x.name for x in written] == ["reel-page-1.tsv", "reel-page-2.tsv"]
+
+    rows = [x.split("\t") for x in written[1].read_text().splitlines()[1:]]
+    assert {x[1] for x in rows} == {"2"}
+
+
+def test_round_trip_split_page(tmp_path):
+    converter = LabelStudioConverter(input_format=Input.TRANSKRIBUS)
+    image = Image.new("RGB", IMAGE_SIZE)
+
+    # Two pages split into two tasks each, with their parts interleaved
+    first, second = [
+        converter.convert(image, TRANSKRIBUS_DATA, url=url, max_regions=1)
+        for url in ["https://example.org/a.jpg", "https://example.org/b.jpg"]
+    ]
+    tasks = [first[0], second[1], first[1], second[0]]
+
+    # Parts from before the number of parts was recorded, which can only be
+    # put back together at the end
+    for task in second:
+        del task["data"]["parts"]
+
+    export = tmp_path / "export.json"
+    export.write_text(json.dumps(tasks))
+
+    written = convert_export(
+        export, tmp_path / "alto", Input.TRANSKRIBUS, image_size
+    )
+    assert [x.name for x in written] == ["a.xml", "b.xml"]
+
+    original = [
+        (x.x, x.y, x.width, x.height, x.text)
+        for x in TranskribusConverter.get_regions(TRANSKRIBUS_DATA, None)
+    ]
+    for path in written:
+        alto = xmltodict.parse(path.read_text())
+        assert [
+            (x.x, x.y, x.width, x.height, x.text)
+            for x in TranskribusConverter.get_regions(alto, None)
+        ] == original
+
+
+def test_empty_annotation_is_final():
+    task = get_tasks()[0]
+    task["annotations"] = [
+        {"result": [{"id": "a", "type": "textarea", "value": {}}]},
+        {"result": [], "was_cancelled": True},
+        {"result": []},
+    ]
+
+    assert get_export_regions(task, image_size) == ([], 301, 401)
+    assert get_export_regions(task) == ([], 0, 0)
+
+
+def test_alto_ids_and_words():
+    regions = [Region("3f2a1b4c-9", 1, 2, 30, 40, "Two words\nThree", 0.5)]
+
+    alto = regions_to_alto(regions, 100, 100)
+
+    block = xmltodict.parse(alto)["alto"]["Layout"]["Page"]["PrintSpace"][
+        "TextBlock"
+    ]
+    assert block["@ID"] == "block_3f2a1b4c-9"
+    assert [x["@ID"] for x in block["TextLine"]] == [
+        "line_3f2a1b4c-9_0",
+        "line_3f2a1b4c-9_1",
+    ]
+    assert [x["@CONTENT"] for x in block["TextLine"][0]["String"]] == [
+        "Two",
+        "words",
+    ]
+    assert '<String CONTENT="Two" WC="0.5" />\n' in alto
+    assert "<SP />" in alto
@@ -0,0 +1,160 @@
+from itertools import count
+from PIL import Image
+
+import json
+import pytest
+
+from ls_converter import LabelStudioConverter, Input, Output
+from ls_converter.serialise import get_task_bytes, join_tasks
+from ls_converter.utils import get_task, Region
+
+TESSERACT_DATA = {
+    "level": [1, 2, 5, 5, 2, 5],
+    "page_num": [1, 1, 1, 1, 1, 1],
+    "block_num": [0, 1, 1, 1, 2, 2],
+    "par_num": [0, 0, 1, 1, 0, 1],
+    "line_num": [0, 0, 1, 1, 0, 1],
+    "word_num": [0, 0, 1, 2, 0, 1],
+    "left": [0, 10, 10, 40, 7, 7],
+    "top": [0, 20, 20, 20, 61, 61],
+    "width": [300, 90, 25, 60, 33, 33],
+    "height": [170, 10, 10, 10, 9, 9],
+    "conf": ["-1", "-1", 91, 88.5, "-1", 12],
+    "text": ["", "", "Café", '"quoted"', "", "line\nbreak"],
+}
+
+ABBYY_DATA = {
+    "layout": {
+        "pages": [
+            {
+                "texts": [
+                    {
+                        "id": 0,
+                        "position": {"l": 3, "t": 5, "r": 130, "b": 60},
+                        "confidence": 0.75,
+                    },
+                    {
+                        "id": 1,
+                        "position": {"l": 13, "t": 80, "r": 230, "b": 99},
+                        "confidence": 1,
+                    },
+                ]
+            }
+        ]
+    },
+    "content": {
+        "paragraphs": [
+            {
+                "text": "A",
+                "role": "text",
+                "layoutReferences": [{"blockId": 0}],
+            },
+            {
+                "text": "B ",
+                "role": "text",
+                "layoutReferences": [{"blockId": 0}],
+            },
+            {
+                "text": "☃",
+                "role": "text",
+                "layoutReferences": [{"blockId": 1}],
+            },
+        ]
+    },
+}
+
+TRANSKRIBUS_DATA = {
+    "alto": {
+        "Layout": {
+            "Page": {
+                "PrintSpace": {
+                    "TextBlock": [
+                        {
+                            "@HPOS": "12",
+                            "@VPOS": "34",
+                            "@WIDTH": "56",
+                            "@HEIGHT": "78",
+                            "TextLine": [
+                                {"String": {"@CONTENT": "First"}},
+                                {"String": {"@CONTENT": "Second"}},
+                            ],
+                        }
+                    ]
+                }
+            }
+        }
+    }
+}
+
+
+@pytest.fixture
+def fixed_ids(monkeypatch):
+    """Make region ids deterministic, so two conversions can be compared."""
+
+    def reset():
+        ids = count()
+        monkeypatch.setattr("ls_converter.get_id", lambda: f"id{next(ids)}")
+
+    return reset
+
+
+@pytest.mark.parametrize(
+    "input_format, input_data, kwargs",
+    [
+        (Input.TESSERACT, TESSERACT_DATA, {}),
+        (Input.TESSERACT, TESSERACT_DATA, {"per_level": 5}),
+        (Input.ABBYY, ABBYY_DATA, {}),
+        (Input.TRANSKRIBUS, TRANSKRIBUS_DATA, {}),
+    ],
+)
+def test_bytes_output_matches_dict_output(
+    fixed_ids, input_format, input_data, kwargs
+):
+    converter = LabelStudioConverter(input_format=input_format)
+    image = Image.new("RGB", (301, 173))
+
+    fixed_ids()
+    as_dict = converter.convert(image, input_data, url="a.jpg", **kwargs)
+
+    fixed_ids()
+    as_bytes = converter.convert(
+        image, input_data, url="a.jpg", output=Output.BYTES, **kwargs
+    )
+
+    assert isinstance(as_bytes, bytes)
+    assert as_bytes == json.dumps(as_dict).encode()
+    assert json.loads(as_bytes) == as_dict
+
+
+@pytest.mark.parametrize("url", [None, "http://example.org/é.jpg"])
+@pytest.mark.parametrize("score", [0, 1, 0.1, 1 / 3, 1e-20, float("nan")])
+def test_get_task_bytes_edge_cases(url, score):
+    regions = [
+        Region("a\\b", 0, 0, 7, 3, "", score),
+        Region('"', 1, 2, 3, 4, "\t\u0000\U0001f600", 2),
+    ]
+
+    assert (
+        get_task_bytes(regions, 7, 3, url)
+        == json.dumps(get_task(regions, 7, 3, url)).encode()
+    )
+
+
+@pytest.mark.parametrize(
+    "data", [None, {"page": 2, "part": 1}, {"ocr": "b.jpg", "page": 2}]
+)
+def test_get_task_bytes_data(data):
+    regions = [Region("a", 0, 0, 7, 3, "Text", 1)]
+
+    assert (
+        get_task_bytes(regions, 7, 3, "a.jpg", data)
+        == json.dumps(get_task(regions, 7, 3, "a.jpg", data)).encode()
+    )
+
+
+def test_empty_task_and_join_tasks():
+    tasks = [get_task([], 10, 10, "a"), get_task([], 10, 10, None)]
+    serialised = [get_task_bytes([], 10, 10, "a"), get_task_bytes([], 10, 10)]
+
+    assert join_tasks(serialised) == json.dumps(tasks).encode()
+    assert join_tasks([]) == b"[]"
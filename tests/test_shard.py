@@ -0,0 +1,112 @@
+from PIL import Image
+
+import json
+import pytest
+
+from ls_converter import Input
+from ls_converter.__main__ import main
+from ls_converter.errors import ShardIncorrect, ShardMismatch
+from ls_converter.shard import (
+    convert_shard,
+    get_shard,
+    merge_shards,
+    parse_shard,
+)
+
+
+def get_data(text):
+    return {
+        "level": [2],
+        "page_num": [1],
+        "block_num": [1],
+        "left": [10],
+        "top": [20],
+        "width": [50],
+        "height": [10],
+        "conf": [90],
+        "text": [text],
+    }
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    Image.new("RGB", (100, 100)).save(tmp_path / "page.png")
+
+    items = []
+    for i in range(20):
+        data = tmp_path / f"page{i}.json"
+        data.write_text(json.dumps(get_data(f"Page {i}")))
+        items.append(
+            {
+                "image": str(tmp_path / "page.png"),
+                "input_data": str(data),
+                "url": f"https://example.org/page{i}.png",
+            }
+        )
+
+    path = tmp_path / "manifest.jsonl"
+    path.write_text("\n".join(json.dumps(x) for x in items))
+    return path
+
+
+def test_parse_and_get_shard():
+    assert parse_shard("2/4") == (2, 4)
+    for shard in ["0/4", "5/4", "a/4", "1"]:
+        with pytest.raises(ShardIncorrect):
+            parse_shard(shard)
+
+    assert get_shard("https://example.org/a.jpg", 4) == get_shard(
+        "https://example.org/a.jpg", 4
+    )
+    assert {get_shard(str(i), 4) for i in range(100)} == {1, 2, 3, 4}
+
+
+def test_convert_and_merge_shards(tmp_path, manifest):
+    shards_dir = tmp_path / "shards"
+    for i in range(1, 4):
+        convert_shard(manifest, shards_dir, f"{i}/3", Input.TESSERACT)
+
+    summary = merge_shards(shards_dir, tmp_path / "merged.json")
+    assert summary == {"tasks": 20, "failed": []}
+
+    merged = json.loads((tmp_path / "merged.json").read_text())
+    assert [x["data"]["ocr"] for x in merged] == [
+        f"https://example.org/page{i}.png" for i in range(20)
+    ]
+
+    # A missing shard is detected
+    (shards_dir / "manifest-2-of-3.json").unlink()
+    with pytest.raises(ShardMismatch):
+        merge_shards(shards_dir, tmp_path / "merged.json")
+
+
+def test_invalid_items_fail_in_one_shard(tmp_path, manifest):
+    with open(manifest, "a") as f:
+        f.write("\n" + json.dumps({"input_data": "page.json"}))
+        f.write("\n" + json.dumps(["not", "an", "object"]))
+
+    shards_dir = tmp_path / "shards"
+    for i in range(1, 4):
+        convert_shard(manifest, shards_dir, f"{i}/3", Input.TESSERACT)
+
+    summary = merge_shards(shards_dir, tmp_path / "merged.json")
+    assert summary["tasks"] == 20
+    assert [x[0] for x in summary["failed"]] == [20, 21]
+
+
+def test_cli(tmp_path, manifest):
+    for i in range(1, 3):
+        main(
+            [
+                "convert",
+                str(manifest),
+                "-o",
+                str(tmp_path),
+                "--shard",
+                f"{i}/2",
+            ]
+        )
+    main(["merge", str(tmp_path), "-o", str(tmp_path / "merged.jsonl")])
+
+    lines = (tmp_path / "merged.jsonl").read_text().splitlines()
+    assert len(lines) == 20
@@ -0,0 +1,90 @@
+from PIL import Image
+
+import json
+import pytest
+
+from ls_converter import (
+    LabelStudioConverter,
+    Input,
+    MaxSizeIncorrect,
+    Output,
+)
+from ls_converter.regions import split_into_parts
+from ls_converter.utils import Region
+
+
+def get_data(lines, words):
+    """Tesseract-like data with the given number of lines of words."""
+
+    data = {
+        key: []
+        for key in ["level", "page_num", "block_num", "left", "top"]
+        + ["width", "height", "conf", "text"]
+    }
+    for line in range(lines):
+        for word in range(words):
+            for key, value in [
+                ("level", 2),
+                ("page_num", 1),
+                ("block_num", line * words + word + 1),
+                ("left", word * 20),
+                ("top", line * 30),
+                ("width", 15),
+                ("height", 20),
+                ("conf", 90),
+                ("text", f"w{line}.{word}"),
+            ]:
+                data[key].append(value)
+
+    return data
+
+
+def test_split_into_parts_keeps_bands_together():
+    regions = [
+        Region(f"{line}.{word}", word * 20, line * 30, 15, 20, "", 0)
+        for line in range(3)
+        for word in range(4)
+    ]
+
+    parts = split_into_parts(regions, [0] * len(regions), max_regions=9)
+    assert [[x.id for x in part] for part in parts] == [
+        [f"{line}.{word}" for line in range(2) for word in range(4)],
+        [f"2.{word}" for word in range(4)],
+    ]
+
+    # A band larger than a part is split left to right
+    parts = split_into_parts(regions, [0] * len(regions), max_regions=3)
+    assert [len(part) for part in parts] == [3, 1, 3, 1, 3, 1]
+
+
+def test_convert_with_max_regions_and_max_bytes():
+    converter = LabelStudioConverter(input_format=Input.TESSERACT)
+    image = Image.new("RGB", (200, 200))
+    data = get_data(lines=5, words=4)
+
+    whole = converter.convert(image, data, url="a.jpg")
+    tasks = converter.convert(image, data, url="a.jpg", max_regions=8)
+
+    assert [x["data"] for x in tasks] == [
+        {"ocr": "a.jpg", "part": i, "parts": 3} for i in range(1, 4)
+    ]
+    assert [len(x["predictions"][0]["result"]) for x in tasks] == [16, 16, 8]
+
+    # Coordinates are unchanged, relative to the whole image
+    assert [
+        result["value"]
+        for x in tasks
+        for result in x["predictions"][0]["result"]
+    ] == [x["value"] for x in whole["predictions"][0]["result"]]
+
+    tasks = converter.convert(
+        image, data, url="a.jpg", max_bytes=2000, output=Output.BYTES
+    )
+    assert len(tasks) > 1
+    assert all(len(x) < 2000 + 200 for x in tasks)
+    assert sum(
+        len(json.loads(x)["predictions"][0]["result"]) for x in tasks
+    ) == len(whole["predictions"][0]["result"])
+
+    with pytest.raises(MaxSizeIncorrect):
+        converter.convert(image, data, url="a.jpg", max_regions=0)
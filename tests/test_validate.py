@@ -0,0 +1,289 @@
+from PIL import Image
+
+import copy
+import json
+import pytest
+
+from ls_converter import Input, LabelStudioConverter
+from ls_converter.__main__ import main
+from ls_converter.errors import IncorrectlyFormattedInputData
+from ls_converter.validate import (
+    validate_abbyy,
+    validate_manifest,
+    validate_transkribus,
+)
+
+TRANSKRIBUS_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<alto xmlns="http://www.loc.gov/standards/alto/ns-v4#">
+  <Layout>
+    <Page>
+      <PrintSpace>
+        {blocks}
+      </PrintSpace>
+    </Page>
+  </Layout>
+</alto>
+"""
+
+ABBYY_DATA = {
+    "layout": {
+        "pages": [
+            {
+                "texts": [
+                    {
+                        "id": 0,
+                        "position": {"l": 3, "t": 5, "r": "130", "b": 60},
+                        "confidence": 0.75,
+                    }
+                ]
+            }
+        ]
+    },
+    "content": {
+        "paragraphs": [
+            {"text": "A", "role": "text", "layoutReferences": [{"blockId": 0}]}
+        ]
+    },
+}
+
+TESSERACT_DATA = {
+    "level": [1, 5],
+    "page_num": [1, 1],
+    "block_num": [0, 1],
+    "left": [0, 1],
+    "top": [0, 2],
+    "width": [10, 3],
+    "height": [10, 4],
+    "conf": ["-1", 90],
+    "text": ["", "Text"],
+}
+
+TEXTBLOCK = """<TextBlock HPOS="1" VPOS="2" WIDTH="3" HEIGHT="4">
+  <TextLine><String CONTENT="Text"/></TextLine>
+</TextBlock>"""
+
+
+def write_manifest(path, items):
+    path.write_text("\n".join(json.dumps(x) for x in items))
+    return path
+
+
+def test_validate_transkribus_manifest(tmp_path):
+    Image.new("RGB", (10, 10)).save(tmp_path / "good.png")
+    (tmp_path / "bad.png").write_bytes(b"not an image")
+    (tmp_path / "good.xml").write_text(
+        TRANSKRIBUS_XML.format(blocks=TEXTBLOCK * 2)
+    )
+    (tmp_path / "empty.xml").write_text(TRANSKRIBUS_XML.format(blocks=""))
+
+    manifest = write_manifest(
+        tmp_path / "manifest.jsonl",
+        [
+            {
+                "image": str(tmp_path / "good.png"),
+                "input_data": str(tmp_path / "good.xml"),
+            },
+            {
+                "image": str(tmp_path / "bad.png"),
+                "input_data": str(tmp_path / "empty.xml"),
+            },
+            {
+                "image": str(tmp_path / "missing.png"),
+                "input_data": str(tmp_path / "missing.xml"),
+            },
+        ],
+    )
+
+    summary = validate_manifest(manifest, Input.TRANSKRIBUS, workers=2)
+
+    assert summary["items"] == 3
+    assert [x[:2] for x in summary["failures"]] == [
+        [1, "image"],
+        [1, "input_data"],
+        [2, "image"],
+        [2, "input_data"],
+    ]
+    assert "Transkribus" in summary["failures"][1][2]
+    assert "FileNotFoundError" in summary["failures"][2][2]
+
+
+@pytest.mark.parametrize(
+    "blocks, texts",
+    [
+        # A single TextBlock
+        (TEXTBLOCK, ["Text"]),
+        # Standard ALTO, with one String per word, and an empty TextBlock
+        (
+            TEXTBLOCK.replace(
+                '<String CONTENT="Text"/>',
+                '<String CONTENT="Two"/><SP/><String CONTENT="words"/>',
+            )
+            + '<TextBlock HPOS="1" VPOS="2" WIDTH="3" HEIGHT="4"/>',
+            ["Two words", ""],
+        ),
+    ],
+)
+def test_validated_transkribus_converts(tmp_path, blocks, texts):
+    path = tmp_path / "page.xml"
+    path.write_text(TRANSKRIBUS_XML.format(blocks=blocks))
+    Image.new("RGB", (10, 10)).save(tmp_path / "page.png")
+
+    assert validate_transkribus(str(path))
+
+    converter = LabelStudioConverter(input_format=Input.TRANSKRIBUS)
+    task = converter.convert(str(tmp_path / "page.png"), str(path), url="a")
+    results = task["predictions"][0]["result"]
+    assert [x["value"]["text"] for x in results[1::2]] == [[x] for x in texts]
+
+
+@pytest.mark.parametrize(
+    "blocks, error",
+    [
+        (TEXTBLOCK.replace('HPOS="1"', ""), "no integer HPOS"),
+        (TEXTBLOCK.replace('WIDTH="3"', 'WIDTH="3.5"'), "no integer WIDTH"),
+        (TEXTBLOCK.replace('CONTENT="Text"', ""), "no CONTENT"),
+    ],
+)
+def test_validate_transkribus_attributes(tmp_path, blocks, error):
+    path = tmp_path / "page.xml"
+    path.write_text(TRANSKRIBUS_XML.format(blocks=blocks))
+
+    with pytest.raises(IncorrectlyFormattedInputData, match=error):
+        validate_transkribus(str(path))
+
+
+def test_validate_abbyy_and_tesseract(tmp_path):
+    Image.new("RGB", (10, 10)).save(tmp_path / "page.png")
+    multipage = {
+        "layout": {"pages": [{"texts": []}, {"texts": []}]},
+        "content": {"paragraphs": []},
+    }
+    (tmp_path / "abbyy.json").write_text(json.dumps(multipage))
+    (tmp_path / "tesseract.json").write_text(json.dumps({"level": [1]}))
+
+    for input_format, data, error in [
+        (Input.ABBYY, "abbyy.json", "MultipageABBYY"),
+        (Input.TESSERACT, "tesseract.json", "Missing columns"),
+    ]:
+        manifest = write_manifest(
+            tmp_path / "manifest.jsonl",
+            [
+                {
+                    "image": str(tmp_path / "page.png"),
+                    "input_data": str(tmp_path / data),
+                }
+            ],
+        )
+
+        failures = validate_manifest(manifest, input_format)["failures"]
+        assert len(failures) == 1 and error in failures[0][2]
+
+    with pytest.raises(SystemExit):
+        main(["validate", str(manifest)])
+
+
+def set_path(data, path, value):
+    data = copy.deepcopy(data)
+    parent = data
+    for key in path[:-1]:
+        parent = parent[key]
+
+    if value is None:
+        del parent[path[-1]]
+    else:
+        parent[path[-1]] = value
+
+    return data
+
+
+BLOCK = ["layout", "pages", 0, "texts", 0]
+PARAGRAPH = ["content", "paragraphs", 0]
+
+
+@pytest.mark.parametrize(
+    "path, value, error",
+    [
+        (BLOCK + ["position", "l"], None, r"KeyError\('l'\)"),
+        (BLOCK + ["position", "b"], "1.5", "no integer position b"),
+        (BLOCK + ["position"], None, r"KeyError\('position'\)"),
+        (BLOCK + ["confidence"], "high", "no numeric confidence"),
+        (BLOCK + ["confidence"], None, r"KeyError\('confidence'\)"),
+        (PARAGRAPH + ["text"], None, r"KeyError\('text'\)"),
+        (PARAGRAPH + ["text"], 1, "text is not a string"),
+        (PARAGRAPH + ["role"], None, "has no role"),
+        (PARAGRAPH + ["layoutReferences", 0, "blockId"], 1, "unknown block"),
+    ],
+)
+def test_validate_abbyy_fields(path, value, error):
+    assert validate_abbyy(ABBYY_DATA)
+
+    with pytest.raises(IncorrectlyFormattedInputData, match=error):
+        validate_abbyy(set_path(ABBYY_DATA, path, value))
+
+
+def test_validate_inline_input_data(tmp_path):
+    Image.new("RGB", (10, 10)).save(tmp_path / "page.png")
+    image = str(tmp_path / "page.png")
+    transkribus = {
+        "alto": {
+            "Layout": {
+                "Page": {
+                    "PrintSpace": {
+                        "TextBlock": {
+                            "@HPOS": "1",
+                            "@VPOS": "2",
+                            "@WIDTH": "3",
+                            "@HEIGHT": "x",
+                        }
+                    }
+                }
+            }
+        }
+    }
+
+    for input_format, items, failures in [
+        (
+            Input.TESSERACT,
+            [
+                {"image": image, "input_data": TESSERACT_DATA},
+                {"image": image, "input_data": {"level": [1]}},
+                {"image": image},
+                {"image": 1, "input_data": ["not", "an", "object"]},
+                "not an object",
+            ],
+            [
+                [1, "input_data", "Missing columns"],
+                [2, "input_data", "Missing."],
+                [3, "image", "Expected a path or URL."],
+                [3, "input_data", "Expected a path or an object."],
+                [4, "item", "Expected an object."],
+            ],
+        ),
+        (
+            Input.ABBYY,
+            [
+                {"image": image, "input_data": ABBYY_DATA},
+                {
+                    "image": image,
+                    "input_data": set_path(
+                        ABBYY_DATA, BLOCK + ["position", "t"], "top"
+                    ),
+                },
+            ],
+            [[1, "input_data", "no integer position t"]],
+        ),
+        (
+            Input.TRANSKRIBUS,
+            [{"image": image, "input_data": transkribus}],
+            [[0, "input_data", "TextBlock 1 has no integer HEIGHT"]],
+        ),
+    ]:
+        manifest = write_manifest(tmp_path / "manifest.jsonl", items)
+
+        summary = validate_manifest(manifest, input_format)
+        assert summary["items"] == len(items)
+        assert [x[:2] for x in summary["failures"]] == [
+            x[:2] for x in failures
+        ]
+        for failure, expected in zip(summary["failures"], failures):
+            assert expected[2] in failure[2]
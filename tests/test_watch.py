@@ -0,0 +1,157 @@
+from PIL import Image
+
+import json
+import threading
+import time
+
+from ls_converter.watch import Watcher
+
+TESSERACT_DATA = {
+    "level": [2],
+    "page_num": [1],
+    "block_num": [1],
+    "left": [10],
+    "top": [20],
+    "width": [50],
+    "height": [10],
+    "conf": [90],
+    "text": ["Hello"],
+}
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_watcher_converts_settled_pairs(tmp_path):
+    input_dir, output_dir = tmp_path / "in", tmp_path / "out"
+    input_dir.mkdir()
+
+    watcher = Watcher(
+        [input_dir],
+        output_dir,
+        url_prefix="https://example.org/",
+        workers=2,
+        queue_size=1,
+        settle=0.1,
+        interval=0.05,
+        max_lines=2,
+    )
+    thread = threading.Thread(target=watcher.run)
+    thread.start()
+
+    try:
+        # Half a pair is never picked up
+        Image.new("RGB", (100, 100)).save(input_dir / "lonely.png")
+
+        for i in range(3):
+            Image.new("RGB", (100, 100)).save(input_dir / f"page{i}.png")
+            (input_dir / f"page{i}.json").write_text(
+                json.dumps(TESSERACT_DATA)
+            )
+
+        wait_for(lambda: watcher.counts["converted"] == 3)
+    finally:
+        watcher.stop()
+        thread.join()
+
+    status = json.loads((output_dir / "status.json").read_text())
+    assert status["state"] == "stopped"
+    assert status["converted"] == 3 and status["failed"] == 0
+
+    # Outputs roll over after max_lines tasks
+    lines = [
+        json.loads(line)
+        for name in ["tasks-00001.jsonl", "tasks-00002.jsonl"]
+        for line in (output_dir / name).read_text().splitlines()
+    ]
+    assert sorted(x["data"]["ocr"] for x in lines) == [
+        f"https://example.org/page{i}.png" for i in range(3)
+    ]
+
+    # Converted pairs are remembered across restarts
+    assert len(Watcher([input_dir], output_dir).done) == 3
+
+
+def test_enqueue_keeps_queued_consistent(tmp_path):
+    watcher = Watcher([tmp_path], tmp_path / "output", queue_size=1)
+
+    # A worker finishing the pair before put returns
+    class Queue:
+        def put(self, pair, timeout=None):
+            with watcher.lock:
+                watcher.queued.discard(pair[0])
+
+        def qsize(self):
+            return 0
+
+    queue = watcher.queue
+    watcher.queue = Queue()
+    watcher.enqueue([("a.png", "a.json")])
+    assert watcher.queued == set()
+
+    # A pair abandoned on stopping, while the queue is full
+    watcher.queue = queue
+    watcher.queue.put(("b.png", "b.json"))
+    threading.Timer(0.1, watcher.stop).start()
+    watcher.enqueue([("c.png", "c.json")])
+    assert watcher.queued == set()
+
+
+def test_watcher_retries_failed_pairs_once_changed(tmp_path):
+    input_dir, output_dir = tmp_path / "in", tmp_path / "out"
+    input_dir.mkdir()
+
+    watcher = Watcher(
+        [input_dir], output_dir, settle=0.05, interval=0.02, url_prefix=""
+    )
+    thread = threading.Thread(target=watcher.run)
+    thread.start()
+
+    try:
+        Image.new("RGB", (100, 100)).save(input_dir / "page.png")
+        (input_dir / "page.json").write_text(json.dumps({"level": [2]}))
+        wait_for(lambda: watcher.counts["failed"] == 1)
+
+        # Not retried while the files are unchanged
+        time.sleep(0.2)
+        assert watcher.counts["failed"] == 1
+
+        (input_dir / "page.json").write_text(json.dumps(TESSERACT_DATA))
+        wait_for(lambda: watcher.counts["converted"] == 1)
+
+        # Converted pairs are dropped from seen on the next scan
+        wait_for(lambda: watcher.seen == {})
+    finally:
+        watcher.stop()
+        thread.join()
+
+    assert watcher.failed == {}
+
+
+def test_watcher_only_looks_at_changed_paths_when_observed(tmp_path):
+    watcher = Watcher([tmp_path], tmp_path / "out", settle=0)
+    watcher.observed = True
+
+    Image.new("RGB", (100, 100)).save(tmp_path / "a.png")
+    assert watcher.scan() == [] and list(watcher.seen) == [
+        str(tmp_path / "a.png")
+    ]
+
+    # Without an event for it, a new file is not looked at
+    (tmp_path / "a.json").write_text(json.dumps(TESSERACT_DATA))
+    assert watcher.scan() == []
+
+    watcher.events.add(str(tmp_path / "a.json"))
+    assert watcher.scan() == [
+        (str(tmp_path / "a.png"), str(tmp_path / "a.json"))
+    ]
+
+    # Converted pairs are no longer looked at
+    watcher.mark_done(str(tmp_path / "a.png"), str(tmp_path / "a.json"))
+    watcher.events.update([str(tmp_path / "a.png"), str(tmp_path / "b")])
+    watcher.seen.clear()
+    assert watcher.scan() == [] and watcher.seen == {}